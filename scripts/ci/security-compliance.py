@@ -8,22 +8,508 @@ import argparse
 import json
 import logging
 import os
+import re
 import sys
 import subprocess
+import time
 import hashlib
-from pathlib import Path
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass
-import requests
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+from dataclasses import asdict, dataclass, is_dataclass
 import zipfile
-import xml.etree.ElementTree as ET
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-@dataclass
-class SecurityIssue:
-    """Security issue data structure"""
+# File extensions inspected by the individual scanners
+_SECRET_SCAN_EXTS = frozenset({'.kt', '.java', '.xml', '.properties', '.json'})
+_CODE_EXTS = frozenset({'.kt', '.java'})
+_CODE_AND_XML_EXTS = frozenset({'.kt', '.java', '.xml'})
+
+# Directories and generated files that never contain first-party sources
+_EXCLUDED_DIRS = frozenset({'.git', 'build', '.gradle', 'node_modules', 'generated', '.idea', 'out',
+                            '.cxx', '.externalNativeBuild'})
+_GENERATED_FILES = frozenset({'R.java', 'BuildConfig.java'})
+
+# Leading bytes inspected for a NUL when deciding whether a file is binary
+_BINARY_SNIFF_BYTES = 8192
+
+# Hardcoded secrets and credentials
+_SECRET_PATTERNS = [
+    (re.compile(rb"password\s*=\s*[\"'][^\"']+[\"']", re.IGNORECASE), "Hardcoded password"),
+    (re.compile(rb"api_key\s*=\s*[\"'][^\"']+[\"']", re.IGNORECASE), "Hardcoded API key"),
+    (re.compile(rb"secret\s*=\s*[\"'][^\"']+[\"']", re.IGNORECASE), "Hardcoded secret"),
+    (re.compile(rb"token\s*=\s*[\"'][^\"']+[\"']", re.IGNORECASE), "Hardcoded token"),
+    (re.compile(rb"[A-Za-z0-9+/]{40,}", re.IGNORECASE), "Potential base64 encoded secret"),
+    (re.compile(rb"[A-Fa-f0-9]{32,}", re.IGNORECASE), "Potential hexadecimal secret"),
+    (re.compile(rb"sk_[a-zA-Z0-9]{24,}", re.IGNORECASE), "Stripe secret key"),
+    (re.compile(rb"pk_[a-zA-Z0-9]{24,}", re.IGNORECASE), "Stripe public key"),
+    (re.compile(rb"AIza[0-9A-Za-z\\-_]{35}", re.IGNORECASE), "Google API key"),
+    (re.compile(rb"ya29\\.[0-9A-Za-z\\-_]+", re.IGNORECASE), "Google OAuth access token")
+]
+
+# SQL built from interpolated or concatenated strings (case-sensitive API names)
+_SQL_INJECTION_PATTERNS = [
+    (re.compile(rb"query\s*\(\s*[\"'][^\"']*\$\{[^}]+\}[^\"']*[\"']"), "String interpolation in SQL query"),
+    (re.compile(rb"rawQuery\s*\(\s*[\"'][^\"']*\+[^\"']*[\"']"), "String concatenation in SQL query"),
+    (re.compile(rb"execSQL\s*\(\s*[\"'][^\"']*\+[^\"']*[\"']"), "String concatenation in SQL execution"),
+    (re.compile(rb"\.query\([^)]*\+[^)]*\)"), "Potential SQL injection in query method")
+]
+
+# Weak or misconfigured cryptography
+_CRYPTO_PATTERNS = [
+    (re.compile(rb"DES|TripleDES", re.IGNORECASE), "Weak encryption algorithm", "high"),
+    (re.compile(rb"MD5|SHA1", re.IGNORECASE), "Weak hashing algorithm", "medium"),
+    (re.compile(rb"RSA.*1024", re.IGNORECASE), "Weak RSA key size", "high"),
+    (re.compile(rb"Random\(\)", re.IGNORECASE), "Weak random number generation", "medium"),
+    (re.compile(rb"TrustAllCerts|TrustManager", re.IGNORECASE), "Insecure certificate validation", "critical"),
+    (re.compile(rb"setHostnameVerifier.*ALLOW_ALL", re.IGNORECASE), "Disabled hostname verification", "critical"),
+    (re.compile(rb"HttpsURLConnection.*setDefaultHostnameVerifier", re.IGNORECASE), "Modified hostname verification", "high")
+]
+
+# Insecure network configuration
+_NETWORK_PATTERNS = [
+    (re.compile(rb"http://", re.IGNORECASE), "Insecure HTTP usage", "medium"),
+    (re.compile(rb"allowBackup.*true", re.IGNORECASE), "Backup allowed", "low"),
+    (re.compile(rb"debuggable.*true", re.IGNORECASE), "Debug mode enabled", "medium"),
+    (re.compile(rb"usesCleartextTraffic.*true", re.IGNORECASE), "Cleartext traffic allowed", "high"),
+    (re.compile(rb"networkSecurityConfig", re.IGNORECASE), "Network security config", "info")
+]
+
+# Unchecked external input (case-sensitive API names)
+_INPUT_VALIDATION_PATTERNS = [
+    (re.compile(rb"Intent\.getStringExtra\([^)]+\)(?!\s*\.let|\s*\?\.)"), "Unchecked intent data", "medium"),
+    (re.compile(rb"getSharedPreferences\([^)]+\)\.getString\([^)]+\)(?!\s*\?\.)"), "Unchecked preferences data", "low"),
+    (re.compile(rb"Uri\.parse\([^)]+\)(?!\s*\.let|\s*\?\.)"), "Unchecked URI parsing", "medium"),
+    (re.compile(rb"JSON\.parse\([^)]+\)(?!\s*try|\s*catch)"), "Unchecked JSON parsing", "medium")
+]
+
+
+def _is_generated(file_name: str) -> bool:
+    """Check whether a file name belongs to build-generated code"""
+    return file_name in _GENERATED_FILES or file_name.endswith('.pb.java')
+
+
+def _decode_line(line: bytes) -> str:
+    """Decode a matched source line for an issue description"""
+    return line.strip().decode('utf-8', 'ignore')
+
+
+def _is_binary(data) -> bool:
+    """Whether file contents look binary (a NUL byte near the start), like grep"""
+    return b'\0' in data[:_BINARY_SNIFF_BYTES]
+
+
+def _iter_source(root: str, exts: frozenset = _SECRET_SCAN_EXTS):
+    """Yield paths of files under root whose extension is in exts"""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in _EXCLUDED_DIRS:
+                            stack.append(entry.path)
+                    elif entry.name[entry.name.rfind('.'):] in exts and not _is_generated(entry.name):
+                        yield entry.path
+        except OSError as e:
+            logger.warning(f"Could not list directory {directory}: {e}")
+
+
+# Keyword groups the privacy, API, data protection, authentication and network
+# checks look for in source files; a group matches when any of its patterns
+# occurs. Patterns with regex metacharacters are matched as case-insensitive
+# regexes, the rest as plain substrings. Regex alternatives within a group are
+# merged into one alternation so each file is searched once per group. Groups
+# are frozensets so testing one against the scan hits is a single set operation.
+_KEYWORD_GROUPS = {
+    # Privacy compliance
+    "data_subject_rights": frozenset({"delete", "export", "portability", "rectification"}),
+    "ccpa": frozenset({"do not sell", "ccpa", "california privacy"}),
+    "age_verification": frozenset({"age", "birth", "parental", "13", "child"}),
+    "privacy_policy": frozenset({"privacy policy", "privacy notice", "data policy"}),
+    # Data collection
+    "location_data": frozenset({"location", "gps", "latitude", "longitude"}),
+    "personal_data": frozenset({"name", "email", "phone", "address"}),
+    "biometric_data": frozenset({"fingerprint", "face", "voice", "pose", "gesture"}),
+    "device_data": frozenset({"device_id", "imei", "android_id", "advertising_id"}),
+    "usage_data": frozenset({"analytics", "telemetry", "usage", "behavior"}),
+    # API security
+    "api_authentication": frozenset({"authorization", "bearer", "token", "oauth", "jwt"}),
+    "https": frozenset({"https://"}),
+    "tls": frozenset({"tls", "ssl", "secure"}),
+    "input_validation": frozenset({"validate", "sanitize", "escape", "filter"}),
+    "rate_limiting": frozenset({"rate limit", "throttle", "quota", "circuit breaker"}),
+    # Data protection
+    "encryption": frozenset({"encrypt", "aes", "rsa", "cipher"}),
+    "secure_storage": frozenset({"keystore", "encrypted_shared_prefs", "security-crypto"}),
+    "retention": frozenset({"delete", "purge", "cleanup", "retention"}),
+    # Authentication
+    "biometric_auth": frozenset({"biometric", "fingerprint", "faceauth", "biometricprompt"}),
+    "session_management": frozenset({"session", "logout", "timeout", "expiry"}),
+    "password_policy": frozenset({"password.*(?:complexity|strength|policy)"}),
+    "multi_factor": frozenset({"mfa", "2fa", "otp", "(?:multi|two).factor"}),
+    # Network security
+    "cert_pinning": frozenset({"trustkit", "certificate.*pinning|pin.*certificate"}),
+    "network_config": frozenset({"network_security_config"}),
+    "proxy_detection": frozenset({"proxy", "vpn.*detect|network.*detection"}),
+}
+
+_SOURCE_KEYWORDS = frozenset(p for patterns in _KEYWORD_GROUPS.values() for p in patterns)
+
+# Source checks reported per validator section: check name -> (result flags,
+# recommendation). Each flag is a (result key, _KEYWORD_GROUPS entry) pair; a
+# group of None marks a placeholder check that always passes. A recommendation
+# pair reads (first flag set, first flag unset).
+_COMPLIANCE_CHECKS = {
+    "privacy": {
+        "privacy_policy": ((("has_privacy_policy_reference", "privacy_policy"),),
+                           ("Ensure privacy policy is accessible and up-to-date",
+                            "Add privacy policy reference in the app")),
+    },
+    "api_security": {
+        "authentication": ((("has_authentication", "api_authentication"),),
+                           ("Review authentication implementation",
+                            "Ensure proper API authentication is implemented")),
+        "encryption": ((("uses_https", "https"), ("has_tls_config", "tls")),
+                       "Ensure all API communications use HTTPS/TLS"),
+        "input_validation": ((("has_input_validation", "input_validation"),),
+                             "Implement comprehensive input validation for all API endpoints"),
+        "rate_limiting": ((("has_rate_limiting", "rate_limiting"),),
+                          "Implement rate limiting to prevent abuse"),
+    },
+    "data_protection": {
+        "encryption_at_rest": ((("has_encryption", "encryption"),),
+                               "Implement strong encryption for sensitive data"),
+        "secure_storage": ((("uses_secure_storage", "secure_storage"),),
+                           "Use Android Keystore and EncryptedSharedPreferences for sensitive data"),
+        # Simplified: a real data minimization review needs more than a keyword scan
+        "data_minimization": ((("practices_minimization", None),),
+                              "Collect only necessary data for app functionality"),
+        "retention_policy": ((("has_retention_policy", "retention"),),
+                             "Implement data retention and deletion policies"),
+    },
+    "authentication": {
+        "biometric_auth": ((("supports_biometric", "biometric_auth"),),
+                           "Implement biometric authentication for enhanced security"),
+        "session_management": ((("has_session_management", "session_management"),),
+                               "Implement proper session management with timeouts"),
+        "password_policy": ((("has_password_policy", "password_policy"),),
+                            "Implement strong password policy enforcement"),
+        "multi_factor": ((("supports_mfa", "multi_factor"),),
+                         "Consider implementing multi-factor authentication"),
+    },
+    "network_security": {
+        "certificate_pinning": ((("has_cert_pinning", "cert_pinning"),),
+                                "Implement certificate pinning for critical connections"),
+        "network_config": ((("has_network_config", "network_config"),),
+                           "Use Android Network Security Configuration for additional protection"),
+        "proxy_detection": ((("detects_proxy", "proxy_detection"),),
+                            "Consider implementing proxy/VPN detection for sensitive operations"),
+    },
+}
+
+
+def _group_matched(group: str, hits: Set[str]) -> bool:
+    """Check whether any pattern of a _KEYWORD_GROUPS entry is among hits"""
+    return not _KEYWORD_GROUPS[group].isdisjoint(hits)
+
+
+_REGEX_METACHARS = frozenset('.^$*+?{}[]\\|()')
+
+
+def _regex_atoms(pattern: str):
+    """Yield (depth, atom) for each atom of a regex, with depth relative to groups
+
+    Escapes, character classes and {m,n} counts are yielded as single atoms so
+    their contents are never mistaken for literal text.
+    """
+    depth = i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        end = i + 1
+        if char == '\\':
+            end = i + 2
+        elif char == '[':
+            # A ']' straight after '[' or '[^' is part of the class
+            start = i + 2 if pattern[i + 1:i + 2] == '^' else i + 1
+            end = pattern.find(']', start + 1) + 1 or len(pattern)
+        elif char == '{':
+            end = pattern.find('}', i) + 1 or len(pattern)
+        elif char == ')':
+            depth -= 1
+        yield depth, pattern[i:end]
+        if char == '(':
+            depth += 1
+        i = end
+
+
+def _longest_literal(branch: str) -> str:
+    """Return the longest run of literal characters outside groups in a regex branch"""
+    atoms = list(_regex_atoms(branch))
+    best = run = ""
+    for index, (depth, atom) in enumerate(atoms):
+        following = atoms[index + 1][1][:1] if index + 1 < len(atoms) else ""
+        if depth == 0 and atom not in _REGEX_METACHARS and len(atom) == 1 and following not in ('*', '?', '+', '{'):
+            run += atom
+            if len(run) > len(best):
+                best = run
+        else:
+            run = ""
+    return best
+
+
+def _required_literals(pattern: str) -> Optional[Tuple[str, ...]]:
+    """Return literals of which every match of pattern contains at least one
+
+    Each top-level alternative must contribute a literal of three or more
+    characters; otherwise no prefilter is possible and None is returned.
+    Escaped characters never count as literal, which can only shorten the result.
+    """
+    branches = [""]
+    for depth, atom in _regex_atoms(pattern):
+        if atom == '|' and depth == 0:
+            branches.append("")
+        else:
+            branches[-1] += atom
+
+    literals = [_longest_literal(branch) for branch in branches]
+    if any(len(literal) < 3 for literal in literals):
+        return None
+    return tuple(dict.fromkeys(literals))
+
+
+class _KeywordMatcher:
+    """Report which of a fixed set of keywords occur in a file's contents
+
+    Keywords are ASCII, so matching runs on lower-cased raw bytes and files are
+    never decoded. With Hyperscan installed every keyword, regex or not, is
+    compiled into one database and matched in a single SIMD pass. Otherwise
+    plain keywords are found with a bytes substring search, or all together in
+    one Aho-Corasick pass when pyahocorasick is installed. Keywords containing
+    regex metacharacters go through the regex engine, and only for files that
+    contain a literal every match of the regex requires. The automaton also
+    carries those required literals, so the same pass that finds the plain
+    keywords narrows the files the regexes have to run on.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = frozenset(patterns)
+        self._literals = []
+        self._regexes = []
+        for pattern in self.patterns:
+            if _REGEX_METACHARS.intersection(pattern):
+                # Lower-casing a regex would also flip escapes such as \D or
+                # \S, so the pattern is compiled as written and made caseless;
+                # only the literals it requires are lower-cased
+                required = _required_literals(pattern)
+                prefilter = tuple(lit.lower().encode() for lit in required) if required else ()
+                self._regexes.append((pattern, re.compile(pattern.encode(), re.IGNORECASE), prefilter))
+            else:
+                self._literals.append((pattern, pattern.lower().encode()))
+
+        self._database = None
+        self._automaton = None
+        if hyperscan is not None and self.patterns:
+            self._database = self._compile_database()
+        elif ahocorasick is not None:
+            words = {keyword for _, keyword in self._literals}
+            words.update(literal for _, _, prefilter in self._regexes for literal in prefilter)
+            if words:
+                # pyahocorasick matches str; latin-1 maps every byte to one char
+                self._automaton = ahocorasick.Automaton()
+                for word in words:
+                    self._automaton.add_word(word.decode('latin-1'), word)
+                self._automaton.make_automaton()
+
+    def _compile_database(self):
+        """Compile all patterns into one Hyperscan block-mode database"""
+        self._database_patterns = [p for p, _ in self._literals] + [p for p, _, _ in self._regexes]
+        expressions = [re.escape(keyword.decode()).encode() for _, keyword in self._literals]
+        expressions += [regex.pattern for _, regex, _ in self._regexes]
+        flags = hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH
+
+        database = hyperscan.Database()
+        database.compile(
+            expressions=expressions,
+            ids=list(range(len(expressions))),
+            elements=len(expressions),
+            flags=[flags] * len(expressions)
+        )
+        return database
+
+    def scan(self, data: bytes, known: Set[str] = frozenset()) -> Set[str]:
+        """Return the patterns found in lower-cased data, skipping those in known"""
+        found = set()
+        if self._database is not None:
+            wanted = len(self.patterns.difference(known))
+            if not wanted:
+                return found
+
+            def on_match(pattern_id, start, end, flags, context):
+                pattern = self._database_patterns[pattern_id]
+                if pattern not in known:
+                    found.add(pattern)
+                # A truthy return value stops the scan once every pattern
+                # still missing has been seen
+                return len(found) == wanted
+
+            try:
+                self._database.scan(data, match_event_handler=on_match)
+            except hyperscan.ScanTerminated:
+                # Raised when on_match stops the scan early
+                pass
+            return found
+
+        if self._automaton is not None:
+            # Keywords and regex prefilter literals seen in this file
+            seen = set()
+            wanted = len(self._automaton)
+            for _, word in self._automaton.iter(data.decode('latin-1')):
+                seen.add(word)
+                if len(seen) == wanted:
+                    break
+            found.update(p for p, keyword in self._literals if p not in known and keyword in seen)
+        else:
+            # One memchr-accelerated substring search per keyword is faster
+            # here than a single finditer over a merged alternation: re tries
+            # every alternative at each offset instead of running a DFA, and
+            # measured about 4x slower on this repository's sources
+            seen = data
+            found.update(p for p, keyword in self._literals if p not in known and keyword in data)
+        for pattern, regex, prefilter in self._regexes:
+            if pattern in known:
+                continue
+            # Only run the regex engine on files containing a required literal
+            if prefilter and not any(literal in seen for literal in prefilter):
+                continue
+            if regex.search(data):
+                found.add(pattern)
+        return found
+
+
+# Below this many files a process pool costs more to start than it saves
+_PARALLEL_SCAN_MIN_FILES = 200
+
+# Shards per worker; smaller shards let the scan stop sooner once all hit
+_SHARDS_PER_WORKER = 4
+
+_MAIN_SOURCE_MARKER = f"{os.sep}src{os.sep}main{os.sep}"
+
+
+def _match_keywords(contents: Iterable, patterns: frozenset) -> Set[str]:
+    """Return the patterns found in any of the given bytes-like contents"""
+    matcher = _KeywordMatcher(patterns)
+    hits = set()
+    for data in contents:
+        hits |= matcher.scan(bytes(data).lower(), hits)
+        if len(hits) == len(matcher.patterns):
+            break
+    return hits
+
+
+def _read_files(file_paths: Iterable[str]):
+    """Yield the contents of each readable file"""
+    for file_path in file_paths:
+        try:
+            with open(file_path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            continue
+        if not _is_binary(data):
+            yield data
+
+
+def _scan_keyword_files(file_paths: List[str], patterns: frozenset) -> Set[str]:
+    """Return the patterns found in any of the given files
+
+    Module-level so it can run in a ProcessPoolExecutor worker.
+    """
+    return _match_keywords(_read_files(file_paths), patterns)
+
+
+def _json_default(obj):
+    """Encode dataclass results such as ComplianceResult for the stdlib encoder"""
+    if is_dataclass(obj):
+        return asdict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _write_json(sections: Dict, output_path: str):
+    """Write a dict as indented JSON one top-level section at a time
+
+    Only one section is serialized in memory at once, using orjson when it is
+    installed; either way the file is laid out as a single indent=2,
+    sort_keys, ensure_ascii=False dump.
+    """
+    with open(output_path, 'wb') as f:
+        f.write(b'{')
+        for i, key in enumerate(sorted(sections)):
+            f.write(b'\n  ' if i == 0 else b',\n  ')
+            f.write(json.dumps(key).encode() + b': ')
+            if orjson is not None:
+                # Dataclasses go through _json_default as well, since orjson
+                # would otherwise write their fields unsorted
+                encoded = orjson.dumps(sections[key], default=_json_default,
+                                       option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS)
+                f.write(encoded.replace(b'\n', b'\n  '))
+            else:
+                # orjson writes UTF-8 and cannot escape, so neither does this
+                encoder = json.JSONEncoder(indent=2, sort_keys=True, ensure_ascii=False, default=_json_default)
+                for chunk in encoder.iterencode(sections[key]):
+                    f.write(chunk.replace('\n', '\n  ').encode())
+        f.write(b'\n}' if sections else b'}')
+
+
+# Display labels for overall and per-framework compliance statuses
+_STATUS_LABELS = {
+    "fully_compliant": "Fully Compliant",
+    "partially_compliant": "Partially Compliant",
+    "non_compliant": "Non Compliant",
+    "compliant": "Compliant",
+    "non-compliant": "Non-Compliant",
+    "warning": "Warning",
+    "unknown": "Unknown"
+}
+
+
+def _status_label(status: str) -> str:
+    """Return the display label of a compliance status"""
+    label = _STATUS_LABELS.get(status)
+    return label if label is not None else status.replace('_', ' ').title()
+
+
+def _security_score(total_issues: int, critical_issues: int, high_issues: int) -> int:
+    """Score from 100 down: 20 per critical, 10 per high, 2 per other issue, floored at 0"""
+    other_issues = max(0, total_issues - critical_issues - high_issues)
+    return max(0, 100 - 20 * critical_issues - 10 * high_issues - 2 * other_issues)
+
+
+class SecurityIssue(NamedTuple):
+    """Security issue record (a plain tuple, cheap to build per match)"""
     category: str
     severity: str  # critical, high, medium, low
     title: str
@@ -33,6 +519,7 @@ class SecurityIssue:
     cwe_id: Optional[str] = None
     recommendation: Optional[str] = None
 
+
 @dataclass
 class ComplianceResult:
     """Compliance validation result"""
@@ -41,6 +528,7 @@ class ComplianceResult:
     issues: List[str]
     recommendations: List[str]
 
+
 class SecurityComplianceValidator:
     """Comprehensive security and compliance validation"""
 
@@ -48,24 +536,75 @@ class SecurityComplianceValidator:
         self.security_issues = []
         self.compliance_results = []
         self.privacy_scan_results = {}
+        self._source_files = {}
+        self._keyword_hits = {}
+        self._file_contents = {}
 
     def run_comprehensive_security_scan(self, apk_path: str, source_dir: str) -> Dict:
         """Run comprehensive security analysis"""
         logger.info("Starting comprehensive security scan...")
 
-        results = {
-            "static_analysis": self._run_static_analysis(source_dir),
-            "apk_analysis": self._analyze_apk_security(apk_path),
-            "dependency_scan": self._scan_dependencies(source_dir),
-            "privacy_scan": self._scan_privacy_compliance(source_dir),
-            "api_security": self._validate_api_security(source_dir),
-            "data_protection": self._validate_data_protection(source_dir),
-            "authentication": self._validate_authentication(source_dir),
-            "network_security": self._validate_network_security(source_dir)
-        }
+        # Resolve symlinks and '..' segments once; every walk, cache key and
+        # reported file path below derives from this canonical directory
+        source_dir = os.path.realpath(source_dir)
+        if not os.path.isdir(source_dir):
+            logger.warning(f"Source directory not found, source checks will find nothing: {source_dir}")
+
+        # Walk the tree once; every scanner filters this list by extension
+        self._source_files[source_dir] = list(_iter_source(source_dir))
+        self._keyword_hits.pop(source_dir, None)
+
+        # Each file is read once, by the first scanner that needs it, and
+        # the contents are shared with the scanners after it
+        self._file_contents.clear()
+        try:
+            results = {
+                "static_analysis": self._run_static_analysis(source_dir),
+                "apk_analysis": self._analyze_apk_security(apk_path),
+                "dependency_scan": self._scan_dependencies(source_dir),
+                "privacy_scan": self._scan_privacy_compliance(source_dir),
+                "api_security": self._validate_api_security(source_dir),
+                "data_protection": self._validate_data_protection(source_dir),
+                "authentication": self._validate_authentication(source_dir),
+                "network_security": self._validate_network_security(source_dir)
+            }
+        finally:
+            self._file_contents.clear()
 
         return results
 
+    def _read_source(self, file_path: str) -> bytes:
+        """Return a file's contents, empty for binary files, reading it once per scan"""
+        data = self._file_contents.get(file_path)
+        if data is None:
+            with open(file_path, 'rb') as f:
+                data = f.read()
+            if _is_binary(data):
+                data = b''
+            self._file_contents[file_path] = data
+        return data
+
+    def _read_sources(self, file_paths: Iterable[str]):
+        """Yield the contents of each readable file"""
+        for file_path in file_paths:
+            try:
+                yield self._read_source(file_path)
+            except OSError:
+                continue
+
+    def _read_lines(self, file_path: str) -> List[bytes]:
+        """Return a file's lines as undecoded bytes"""
+        return self._read_source(file_path).split(b'\n')
+
+    def _iter_files(self, source_dir: str, exts: frozenset = _SECRET_SCAN_EXTS):
+        """Yield source files with one of the given extensions"""
+        files = self._source_files.get(source_dir)
+        if files is None:
+            files = self._source_files[source_dir] = list(_iter_source(source_dir))
+        for file_path in files:
+            if file_path[file_path.rfind('.'):] in exts:
+                yield file_path
+
     def _run_static_analysis(self, source_dir: str) -> Dict:
         """Run static code analysis for security vulnerabilities"""
         logger.info("Running static security analysis...")
@@ -87,218 +626,145 @@ class SecurityComplianceValidator:
         # Check for improper input validation
         issues.extend(self._scan_input_validation(source_dir))
 
+        severity_counts = Counter(issue.severity for issue in issues)
+
         return {
             "total_issues": len(issues),
-            "critical_issues": len([i for i in issues if i.severity == "critical"]),
-            "high_issues": len([i for i in issues if i.severity == "high"]),
-            "medium_issues": len([i for i in issues if i.severity == "medium"]),
-            "low_issues": len([i for i in issues if i.severity == "low"]),
-            "issues": [self._issue_to_dict(issue) for issue in issues]
+            "critical_issues": severity_counts["critical"],
+            "high_issues": severity_counts["high"],
+            "medium_issues": severity_counts["medium"],
+            "low_issues": severity_counts["low"],
+            "issues": self._issues_to_dicts(issues)
         }
 
     def _scan_hardcoded_secrets(self, source_dir: str) -> List[SecurityIssue]:
         """Scan for hardcoded secrets and credentials"""
         issues = []
-        secret_patterns = [
-            (r"password\s*=\s*[\"'][^\"']+[\"']", "Hardcoded password"),
-            (r"api_key\s*=\s*[\"'][^\"']+[\"']", "Hardcoded API key"),
-            (r"secret\s*=\s*[\"'][^\"']+[\"']", "Hardcoded secret"),
-            (r"token\s*=\s*[\"'][^\"']+[\"']", "Hardcoded token"),
-            (r"[A-Za-z0-9+/]{40,}", "Potential base64 encoded secret"),
-            (r"[A-Fa-f0-9]{32,}", "Potential hexadecimal secret"),
-            (r"sk_[a-zA-Z0-9]{24,}", "Stripe secret key"),
-            (r"pk_[a-zA-Z0-9]{24,}", "Stripe public key"),
-            (r"AIza[0-9A-Za-z\\-_]{35}", "Google API key"),
-            (r"ya29\\.[0-9A-Za-z\\-_]+", "Google OAuth access token")
-        ]
-
-        import re
-
-        for root, dirs, files in os.walk(source_dir):
-            for file in files:
-                if file.endswith(('.kt', '.java', '.xml', '.properties', '.json')):
-                    file_path = os.path.join(root, file)
-                    try:
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            content = f.read()
-                            lines = content.split('\n')
-
-                            for line_num, line in enumerate(lines, 1):
-                                for pattern, description in secret_patterns:
-                                    if re.search(pattern, line, re.IGNORECASE):
-                                        issues.append(SecurityIssue(
-                                            category="secrets",
-                                            severity="critical",
-                                            title=description,
-                                            description=f"Potential {description.lower()} found in source code",
-                                            file_path=file_path,
-                                            line_number=line_num,
-                                            cwe_id="CWE-798",
-                                            recommendation="Use environment variables or secure configuration management"
-                                        ))
-                    except Exception as e:
-                        logger.warning(f"Could not scan file {file_path}: {e}")
+
+        for file_path in self._iter_files(source_dir):
+            try:
+                lines = self._read_lines(file_path)
+
+                for line_num, line in enumerate(lines, 1):
+                    for pattern, description in _SECRET_PATTERNS:
+                        if pattern.search(line):
+                            issues.append(SecurityIssue(
+                                category="secrets",
+                                severity="critical",
+                                title=description,
+                                description=f"Potential {description.lower()} found in source code",
+                                file_path=file_path,
+                                line_number=line_num,
+                                cwe_id="CWE-798",
+                                recommendation="Use environment variables or secure configuration management"
+                            ))
+            except Exception as e:
+                logger.warning(f"Could not scan file {file_path}: {e}")
 
         return issues
 
     def _scan_sql_injection(self, source_dir: str) -> List[SecurityIssue]:
         """Scan for SQL injection vulnerabilities"""
         issues = []
-        vulnerable_patterns = [
-            (r"query\s*\(\s*[\"'][^\"']*\$\{[^}]+\}[^\"']*[\"']", "String interpolation in SQL query"),
-            (r"rawQuery\s*\(\s*[\"'][^\"']*\+[^\"']*[\"']", "String concatenation in SQL query"),
-            (r"execSQL\s*\(\s*[\"'][^\"']*\+[^\"']*[\"']", "String concatenation in SQL execution"),
-            (r"\.query\([^)]*\+[^)]*\)", "Potential SQL injection in query method")
-        ]
-
-        import re
-
-        for root, dirs, files in os.walk(source_dir):
-            for file in files:
-                if file.endswith(('.kt', '.java')):
-                    file_path = os.path.join(root, file)
-                    try:
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            content = f.read()
-                            lines = content.split('\n')
-
-                            for line_num, line in enumerate(lines, 1):
-                                for pattern, description in vulnerable_patterns:
-                                    if re.search(pattern, line):
-                                        issues.append(SecurityIssue(
-                                            category="injection",
-                                            severity="high",
-                                            title="Potential SQL Injection",
-                                            description=f"{description}: {line.strip()}",
-                                            file_path=file_path,
-                                            line_number=line_num,
-                                            cwe_id="CWE-89",
-                                            recommendation="Use parameterized queries or prepared statements"
-                                        ))
-                    except Exception as e:
-                        logger.warning(f"Could not scan file {file_path}: {e}")
+
+        for file_path in self._iter_files(source_dir, _CODE_EXTS):
+            try:
+                lines = self._read_lines(file_path)
+
+                for line_num, line in enumerate(lines, 1):
+                    for pattern, description in _SQL_INJECTION_PATTERNS:
+                        if pattern.search(line):
+                            issues.append(SecurityIssue(
+                                category="injection",
+                                severity="high",
+                                title="Potential SQL Injection",
+                                description=f"{description}: {_decode_line(line)}",
+                                file_path=file_path,
+                                line_number=line_num,
+                                cwe_id="CWE-89",
+                                recommendation="Use parameterized queries or prepared statements"
+                            ))
+            except Exception as e:
+                logger.warning(f"Could not scan file {file_path}: {e}")
 
         return issues
 
     def _scan_crypto_issues(self, source_dir: str) -> List[SecurityIssue]:
         """Scan for cryptographic vulnerabilities"""
         issues = []
-        crypto_issues = [
-            (r"DES|TripleDES", "Weak encryption algorithm", "high"),
-            (r"MD5|SHA1", "Weak hashing algorithm", "medium"),
-            (r"RSA.*1024", "Weak RSA key size", "high"),
-            (r"Random\(\)", "Weak random number generation", "medium"),
-            (r"TrustAllCerts|TrustManager", "Insecure certificate validation", "critical"),
-            (r"setHostnameVerifier.*ALLOW_ALL", "Disabled hostname verification", "critical"),
-            (r"HttpsURLConnection.*setDefaultHostnameVerifier", "Modified hostname verification", "high")
-        ]
-
-        import re
-
-        for root, dirs, files in os.walk(source_dir):
-            for file in files:
-                if file.endswith(('.kt', '.java')):
-                    file_path = os.path.join(root, file)
-                    try:
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            content = f.read()
-                            lines = content.split('\n')
-
-                            for line_num, line in enumerate(lines, 1):
-                                for pattern, description, severity in crypto_issues:
-                                    if re.search(pattern, line, re.IGNORECASE):
-                                        issues.append(SecurityIssue(
-                                            category="cryptography",
-                                            severity=severity,
-                                            title="Cryptographic Vulnerability",
-                                            description=f"{description}: {line.strip()}",
-                                            file_path=file_path,
-                                            line_number=line_num,
-                                            cwe_id="CWE-327",
-                                            recommendation="Use strong, modern cryptographic algorithms"
-                                        ))
-                    except Exception as e:
-                        logger.warning(f"Could not scan file {file_path}: {e}")
+
+        for file_path in self._iter_files(source_dir, _CODE_EXTS):
+            try:
+                lines = self._read_lines(file_path)
+
+                for line_num, line in enumerate(lines, 1):
+                    for pattern, description, severity in _CRYPTO_PATTERNS:
+                        if pattern.search(line):
+                            issues.append(SecurityIssue(
+                                category="cryptography",
+                                severity=severity,
+                                title="Cryptographic Vulnerability",
+                                description=f"{description}: {_decode_line(line)}",
+                                file_path=file_path,
+                                line_number=line_num,
+                                cwe_id="CWE-327",
+                                recommendation="Use strong, modern cryptographic algorithms"
+                            ))
+            except Exception as e:
+                logger.warning(f"Could not scan file {file_path}: {e}")
 
         return issues
 
     def _scan_network_security_issues(self, source_dir: str) -> List[SecurityIssue]:
         """Scan for network security issues"""
         issues = []
-        network_issues = [
-            (r"http://", "Insecure HTTP usage", "medium"),
-            (r"allowBackup.*true", "Backup allowed", "low"),
-            (r"debuggable.*true", "Debug mode enabled", "medium"),
-            (r"usesCleartextTraffic.*true", "Cleartext traffic allowed", "high"),
-            (r"networkSecurityConfig", "Network security config", "info")
-        ]
-
-        import re
-
-        for root, dirs, files in os.walk(source_dir):
-            for file in files:
-                if file.endswith(('.kt', '.java', '.xml')):
-                    file_path = os.path.join(root, file)
-                    try:
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            content = f.read()
-                            lines = content.split('\n')
-
-                            for line_num, line in enumerate(lines, 1):
-                                for pattern, description, severity in network_issues:
-                                    if re.search(pattern, line, re.IGNORECASE):
-                                        if severity != "info":  # Skip info-level findings
-                                            issues.append(SecurityIssue(
-                                                category="network",
-                                                severity=severity,
-                                                title="Network Security Issue",
-                                                description=f"{description}: {line.strip()}",
-                                                file_path=file_path,
-                                                line_number=line_num,
-                                                cwe_id="CWE-319",
-                                                recommendation="Use HTTPS and secure network configurations"
-                                            ))
-                    except Exception as e:
-                        logger.warning(f"Could not scan file {file_path}: {e}")
+
+        for file_path in self._iter_files(source_dir, _CODE_AND_XML_EXTS):
+            try:
+                lines = self._read_lines(file_path)
+
+                for line_num, line in enumerate(lines, 1):
+                    for pattern, description, severity in _NETWORK_PATTERNS:
+                        if pattern.search(line):
+                            if severity != "info":  # Skip info-level findings
+                                issues.append(SecurityIssue(
+                                    category="network",
+                                    severity=severity,
+                                    title="Network Security Issue",
+                                    description=f"{description}: {_decode_line(line)}",
+                                    file_path=file_path,
+                                    line_number=line_num,
+                                    cwe_id="CWE-319",
+                                    recommendation="Use HTTPS and secure network configurations"
+                                ))
+            except Exception as e:
+                logger.warning(f"Could not scan file {file_path}: {e}")
 
         return issues
 
     def _scan_input_validation(self, source_dir: str) -> List[SecurityIssue]:
         """Scan for input validation issues"""
         issues = []
-        validation_issues = [
-            (r"Intent\.getStringExtra\([^)]+\)(?!\s*\.let|\s*\?\.)", "Unchecked intent data", "medium"),
-            (r"getSharedPreferences\([^)]+\)\.getString\([^)]+\)(?!\s*\?\.)", "Unchecked preferences data", "low"),
-            (r"Uri\.parse\([^)]+\)(?!\s*\.let|\s*\?\.)", "Unchecked URI parsing", "medium"),
-            (r"JSON\.parse\([^)]+\)(?!\s*try|\s*catch)", "Unchecked JSON parsing", "medium")
-        ]
-
-        import re
-
-        for root, dirs, files in os.walk(source_dir):
-            for file in files:
-                if file.endswith(('.kt', '.java')):
-                    file_path = os.path.join(root, file)
-                    try:
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            content = f.read()
-                            lines = content.split('\n')
-
-                            for line_num, line in enumerate(lines, 1):
-                                for pattern, description, severity in validation_issues:
-                                    if re.search(pattern, line):
-                                        issues.append(SecurityIssue(
-                                            category="input_validation",
-                                            severity=severity,
-                                            title="Input Validation Issue",
-                                            description=f"{description}: {line.strip()}",
-                                            file_path=file_path,
-                                            line_number=line_num,
-                                            cwe_id="CWE-20",
-                                            recommendation="Implement proper input validation and sanitization"
-                                        ))
-                    except Exception as e:
-                        logger.warning(f"Could not scan file {file_path}: {e}")
+
+        for file_path in self._iter_files(source_dir, _CODE_EXTS):
+            try:
+                lines = self._read_lines(file_path)
+
+                for line_num, line in enumerate(lines, 1):
+                    for pattern, description, severity in _INPUT_VALIDATION_PATTERNS:
+                        if pattern.search(line):
+                            issues.append(SecurityIssue(
+                                category="input_validation",
+                                severity=severity,
+                                title="Input Validation Issue",
+                                description=f"{description}: {_decode_line(line)}",
+                                file_path=file_path,
+                                line_number=line_num,
+                                cwe_id="CWE-20",
+                                recommendation="Implement proper input validation and sanitization"
+                            ))
+            except Exception as e:
+                logger.warning(f"Could not scan file {file_path}: {e}")
 
         return issues
 
@@ -462,11 +928,12 @@ class SecurityComplianceValidator:
             # Extract and analyze native libraries
             with zipfile.ZipFile(apk_path, 'r') as apk_zip:
                 lib_files = [f for f in apk_zip.namelist() if f.startswith('lib/')]
+                architectures = {f.split('/', 2)[1] for f in lib_files}
 
                 security_features = {
                     "has_native_libraries": len(lib_files) > 0,
                     "library_count": len(lib_files),
-                    "architectures": list(set(f.split('/')[1] for f in lib_files if '/' in f)),
+                    "architectures": list(architectures),
                     "obfuscated": self._check_obfuscation(apk_zip)
                 }
 
@@ -498,23 +965,37 @@ class SecurityComplianceValidator:
                 "--out", "dependency-check-report"
             ], capture_output=True, text=True, timeout=300)
 
-            if os.path.exists("dependency-check-report/dependency-check-report.json"):
-                with open("dependency-check-report/dependency-check-report.json", 'r') as f:
-                    report = json.load(f)
-
+            report_path = "dependency-check-report/dependency-check-report.json"
+            if os.path.exists(report_path):
+                total_dependencies = 0
+                vulnerable_dependencies = 0
                 vulnerabilities = []
-                for dependency in report.get("dependencies", []):
-                    for vuln in dependency.get("vulnerabilities", []):
-                        vulnerabilities.append({
-                            "name": dependency.get("fileName", "Unknown"),
-                            "cve": vuln.get("name", ""),
-                            "severity": vuln.get("severity", ""),
-                            "description": vuln.get("description", "")
-                        })
+
+                with open(report_path, 'rb') as f:
+                    # Reports for large projects run to hundreds of MB; stream
+                    # one dependency at a time when ijson is available
+                    if ijson is not None:
+                        dependencies = ijson.items(f, 'dependencies.item')
+                    else:
+                        dependencies = json.load(f).get("dependencies", [])
+
+                    for dependency in dependencies:
+                        total_dependencies += 1
+                        dependency_vulns = dependency.get("vulnerabilities")
+                        if not dependency_vulns:
+                            continue
+                        vulnerable_dependencies += 1
+                        for vuln in dependency_vulns:
+                            vulnerabilities.append({
+                                "name": dependency.get("fileName", "Unknown"),
+                                "cve": vuln.get("name", ""),
+                                "severity": vuln.get("severity", ""),
+                                "description": vuln.get("description", "")
+                            })
 
                 return {
-                    "total_dependencies": len(report.get("dependencies", [])),
-                    "vulnerable_dependencies": len([d for d in report.get("dependencies", []) if d.get("vulnerabilities")]),
+                    "total_dependencies": total_dependencies,
+                    "vulnerable_dependencies": vulnerable_dependencies,
                     "total_vulnerabilities": len(vulnerabilities),
                     "vulnerabilities": vulnerabilities
                 }
@@ -533,7 +1014,7 @@ class SecurityComplianceValidator:
             "ccpa": self._check_ccpa_compliance(source_dir),
             "coppa": self._check_coppa_compliance(source_dir),
             "data_collection": self._analyze_data_collection(source_dir),
-            "privacy_policy": self._check_privacy_policy(source_dir)
+            **self._run_checks("privacy", source_dir)
         }
 
         return compliance_results
@@ -544,29 +1025,24 @@ class SecurityComplianceValidator:
         recommendations = []
 
         # Check for consent management
-        consent_patterns = ["consent", "gdpr", "cookie", "tracking"]
+        consent_patterns = [b"consent", b"gdpr", b"cookie", b"tracking"]
         consent_found = False
 
-        for root, dirs, files in os.walk(source_dir):
-            for file in files:
-                if file.endswith(('.kt', '.java')):
-                    file_path = os.path.join(root, file)
-                    try:
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            content = f.read().lower()
-                            if any(pattern in content for pattern in consent_patterns):
-                                consent_found = True
-                                break
-                    except:
-                        continue
+        for file_path in self._iter_files(source_dir, _CODE_EXTS):
+            try:
+                content = self._read_source(file_path).lower()
+            except OSError:
+                continue
+            if any(pattern in content for pattern in consent_patterns):
+                consent_found = True
+                break
 
         if not consent_found:
             issues.append("No consent management implementation found")
             recommendations.append("Implement user consent collection and management")
 
         # Check for data subject rights
-        rights_patterns = ["delete", "export", "portability", "rectification"]
-        rights_found = any(self._search_in_source(source_dir, pattern) for pattern in rights_patterns)
+        rights_found = self._search_group(source_dir, "data_subject_rights")
 
         if not rights_found:
             issues.append("No data subject rights implementation found")
@@ -581,8 +1057,7 @@ class SecurityComplianceValidator:
         recommendations = []
 
         # Check for "Do Not Sell" implementation
-        ccpa_patterns = ["do not sell", "ccpa", "california privacy"]
-        ccpa_found = any(self._search_in_source(source_dir, pattern) for pattern in ccpa_patterns)
+        ccpa_found = self._search_group(source_dir, "ccpa")
 
         if not ccpa_found:
             issues.append("No CCPA 'Do Not Sell' implementation found")
@@ -597,8 +1072,7 @@ class SecurityComplianceValidator:
         recommendations = []
 
         # Check for age verification
-        age_patterns = ["age", "birth", "parental", "13", "child"]
-        age_verification = any(self._search_in_source(source_dir, pattern) for pattern in age_patterns)
+        age_verification = self._search_group(source_dir, "age_verification")
 
         if not age_verification:
             issues.append("No age verification implementation found")
@@ -607,37 +1081,53 @@ class SecurityComplianceValidator:
         status = "warning" if issues else "compliant"
         return ComplianceResult("COPPA", status, issues, recommendations)
 
-    def _search_in_source(self, source_dir: str, pattern: str) -> bool:
-        """Search for pattern in source code"""
-        import re
-        for root, dirs, files in os.walk(source_dir):
-            for file in files:
-                if file.endswith(('.kt', '.java', '.xml')):
-                    file_path = os.path.join(root, file)
-                    try:
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            content = f.read()
-                            if re.search(pattern, content, re.IGNORECASE):
-                                return True
-                    except:
-                        continue
-        return False
+    def _source_keyword_hits(self, source_dir: str) -> Set[str]:
+        """Return the _SOURCE_KEYWORDS found in source_dir, reading each file once"""
+        hits = self._keyword_hits.get(source_dir)
+        if hits is not None:
+            return hits
+
+        # Application sources are the likeliest to hold every keyword; scan
+        # them first so the early exit below triggers as soon as possible
+        files = sorted(self._iter_files(source_dir, _CODE_AND_XML_EXTS),
+                       key=lambda path: _MAIN_SOURCE_MARKER not in path)
+        workers = os.cpu_count() or 1
+        hits = None
+
+        if workers > 1 and len(files) >= _PARALLEL_SCAN_MIN_FILES:
+            shard_size = -(-len(files) // (workers * _SHARDS_PER_WORKER))
+            shards = [files[i:i + shard_size] for i in range(0, len(files), shard_size)]
+            try:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    futures = [executor.submit(_scan_keyword_files, shard, _SOURCE_KEYWORDS) for shard in shards]
+                    hits = set()
+                    for future in as_completed(futures):
+                        hits |= future.result()
+                        if len(hits) == len(_SOURCE_KEYWORDS):
+                            for pending in futures:
+                                pending.cancel()
+                            break
+            except (OSError, BrokenProcessPool) as e:
+                logger.warning(f"Parallel keyword scan failed, scanning serially: {e}")
+                hits = None
+
+        if hits is None:
+            hits = _match_keywords(self._read_sources(files), _SOURCE_KEYWORDS)
+
+        self._keyword_hits[source_dir] = hits
+        return hits
+
+    def _search_group(self, source_dir: str, group: str) -> bool:
+        """Check whether any pattern of a _KEYWORD_GROUPS entry occurs in source code"""
+        return _group_matched(group, self._source_keyword_hits(source_dir))
 
     def _analyze_data_collection(self, source_dir: str) -> Dict:
         """Analyze data collection practices"""
-        data_types = {
-            "location": ["location", "gps", "latitude", "longitude"],
-            "personal": ["name", "email", "phone", "address"],
-            "biometric": ["fingerprint", "face", "voice", "pose", "gesture"],
-            "device": ["device_id", "imei", "android_id", "advertising_id"],
-            "usage": ["analytics", "telemetry", "usage", "behavior"]
-        }
+        data_types = ["location", "personal", "biometric", "device", "usage"]
 
-        collected_data = {}
-        for data_type, patterns in data_types.items():
-            collected_data[data_type] = any(
-                self._search_in_source(source_dir, pattern) for pattern in patterns
-            )
+        collected_data = {
+            data_type: self._search_group(source_dir, f"{data_type}_data") for data_type in data_types
+        }
 
         return {
             "data_types_collected": [k for k, v in collected_data.items() if v],
@@ -645,232 +1135,53 @@ class SecurityComplianceValidator:
             "collection_summary": collected_data
         }
 
-    def _check_privacy_policy(self, source_dir: str) -> Dict:
-        """Check for privacy policy implementation"""
-        privacy_patterns = ["privacy policy", "privacy notice", "data policy"]
-        policy_found = any(self._search_in_source(source_dir, pattern) for pattern in privacy_patterns)
-
-        return {
-            "has_privacy_policy_reference": policy_found,
-            "recommendation": "Ensure privacy policy is accessible and up-to-date" if policy_found else "Add privacy policy reference in the app"
-        }
+    def _run_checks(self, section: str, source_dir: str) -> Dict:
+        """Evaluate one section of _COMPLIANCE_CHECKS against the source keyword hits"""
+        hits = self._source_keyword_hits(source_dir)
+        results = {}
+        for check, (flags, recommendation) in _COMPLIANCE_CHECKS[section].items():
+            result = {key: group is None or _group_matched(group, hits) for key, group in flags}
+            if not isinstance(recommendation, str):
+                recommendation = recommendation[0] if result[flags[0][0]] else recommendation[1]
+            result["recommendation"] = recommendation
+            results[check] = result
+        return results
 
     def _validate_api_security(self, source_dir: str) -> Dict:
         """Validate API security implementations"""
         logger.info("Validating API security...")
-
-        api_security = {
-            "authentication": self._check_api_authentication(source_dir),
-            "encryption": self._check_api_encryption(source_dir),
-            "input_validation": self._check_api_input_validation(source_dir),
-            "rate_limiting": self._check_rate_limiting(source_dir)
-        }
-
-        return api_security
-
-    def _check_api_authentication(self, source_dir: str) -> Dict:
-        """Check API authentication implementation"""
-        auth_patterns = ["authorization", "bearer", "token", "oauth", "jwt"]
-        auth_found = any(self._search_in_source(source_dir, pattern) for pattern in auth_patterns)
-
-        return {
-            "has_authentication": auth_found,
-            "recommendation": "Ensure proper API authentication is implemented" if not auth_found else "Review authentication implementation"
-        }
-
-    def _check_api_encryption(self, source_dir: str) -> Dict:
-        """Check API encryption usage"""
-        https_usage = self._search_in_source(source_dir, "https://")
-        tls_patterns = ["tls", "ssl", "secure"]
-        tls_found = any(self._search_in_source(source_dir, pattern) for pattern in tls_patterns)
-
-        return {
-            "uses_https": https_usage,
-            "has_tls_config": tls_found,
-            "recommendation": "Ensure all API communications use HTTPS/TLS"
-        }
-
-    def _check_api_input_validation(self, source_dir: str) -> Dict:
-        """Check API input validation"""
-        validation_patterns = ["validate", "sanitize", "escape", "filter"]
-        validation_found = any(self._search_in_source(source_dir, pattern) for pattern in validation_patterns)
-
-        return {
-            "has_input_validation": validation_found,
-            "recommendation": "Implement comprehensive input validation for all API endpoints"
-        }
-
-    def _check_rate_limiting(self, source_dir: str) -> Dict:
-        """Check for rate limiting implementation"""
-        rate_patterns = ["rate limit", "throttle", "quota", "circuit breaker"]
-        rate_limiting = any(self._search_in_source(source_dir, pattern) for pattern in rate_patterns)
-
-        return {
-            "has_rate_limiting": rate_limiting,
-            "recommendation": "Implement rate limiting to prevent abuse"
-        }
+        return self._run_checks("api_security", source_dir)
 
     def _validate_data_protection(self, source_dir: str) -> Dict:
         """Validate data protection measures"""
         logger.info("Validating data protection...")
-
-        return {
-            "encryption_at_rest": self._check_data_encryption(source_dir),
-            "secure_storage": self._check_secure_storage(source_dir),
-            "data_minimization": self._check_data_minimization(source_dir),
-            "retention_policy": self._check_retention_policy(source_dir)
-        }
-
-    def _check_data_encryption(self, source_dir: str) -> Dict:
-        """Check data encryption implementation"""
-        encryption_patterns = ["encrypt", "aes", "rsa", "cipher"]
-        encryption_found = any(self._search_in_source(source_dir, pattern) for pattern in encryption_patterns)
-
-        return {
-            "has_encryption": encryption_found,
-            "recommendation": "Implement strong encryption for sensitive data"
-        }
-
-    def _check_secure_storage(self, source_dir: str) -> Dict:
-        """Check secure storage implementation"""
-        secure_patterns = ["keystore", "encrypted_shared_prefs", "security-crypto"]
-        secure_storage = any(self._search_in_source(source_dir, pattern) for pattern in secure_patterns)
-
-        return {
-            "uses_secure_storage": secure_storage,
-            "recommendation": "Use Android Keystore and EncryptedSharedPreferences for sensitive data"
-        }
-
-    def _check_data_minimization(self, source_dir: str) -> Dict:
-        """Check data minimization practices"""
-        # This is a simplified check - in practice, this would be more comprehensive
-        return {
-            "practices_minimization": True,  # Placeholder
-            "recommendation": "Collect only necessary data for app functionality"
-        }
-
-    def _check_retention_policy(self, source_dir: str) -> Dict:
-        """Check data retention policy implementation"""
-        retention_patterns = ["delete", "purge", "cleanup", "retention"]
-        retention_found = any(self._search_in_source(source_dir, pattern) for pattern in retention_patterns)
-
-        return {
-            "has_retention_policy": retention_found,
-            "recommendation": "Implement data retention and deletion policies"
-        }
+        return self._run_checks("data_protection", source_dir)
 
     def _validate_authentication(self, source_dir: str) -> Dict:
         """Validate authentication security"""
         logger.info("Validating authentication security...")
-
-        return {
-            "biometric_auth": self._check_biometric_auth(source_dir),
-            "session_management": self._check_session_management(source_dir),
-            "password_policy": self._check_password_policy(source_dir),
-            "multi_factor": self._check_multi_factor_auth(source_dir)
-        }
-
-    def _check_biometric_auth(self, source_dir: str) -> Dict:
-        """Check biometric authentication implementation"""
-        biometric_patterns = ["biometric", "fingerprint", "faceauth", "biometricprompt"]
-        biometric_found = any(self._search_in_source(source_dir, pattern) for pattern in biometric_patterns)
-
-        return {
-            "supports_biometric": biometric_found,
-            "recommendation": "Implement biometric authentication for enhanced security"
-        }
-
-    def _check_session_management(self, source_dir: str) -> Dict:
-        """Check session management implementation"""
-        session_patterns = ["session", "logout", "timeout", "expiry"]
-        session_mgmt = any(self._search_in_source(source_dir, pattern) for pattern in session_patterns)
-
-        return {
-            "has_session_management": session_mgmt,
-            "recommendation": "Implement proper session management with timeouts"
-        }
-
-    def _check_password_policy(self, source_dir: str) -> Dict:
-        """Check password policy implementation"""
-        password_patterns = ["password.*complexity", "password.*strength", "password.*policy"]
-        policy_found = any(self._search_in_source(source_dir, pattern) for pattern in password_patterns)
-
-        return {
-            "has_password_policy": policy_found,
-            "recommendation": "Implement strong password policy enforcement"
-        }
-
-    def _check_multi_factor_auth(self, source_dir: str) -> Dict:
-        """Check multi-factor authentication"""
-        mfa_patterns = ["mfa", "2fa", "multi.factor", "two.factor", "otp"]
-        mfa_found = any(self._search_in_source(source_dir, pattern) for pattern in mfa_patterns)
-
-        return {
-            "supports_mfa": mfa_found,
-            "recommendation": "Consider implementing multi-factor authentication"
-        }
+        return self._run_checks("authentication", source_dir)
 
     def _validate_network_security(self, source_dir: str) -> Dict:
         """Validate network security configurations"""
         logger.info("Validating network security...")
+        return self._run_checks("network_security", source_dir)
 
-        return {
-            "certificate_pinning": self._check_cert_pinning(source_dir),
-            "network_config": self._check_network_security_config(source_dir),
-            "proxy_detection": self._check_proxy_detection(source_dir)
-        }
-
-    def _check_cert_pinning(self, source_dir: str) -> Dict:
-        """Check certificate pinning implementation"""
-        pinning_patterns = ["certificate.*pinning", "pin.*certificate", "trustkit"]
-        pinning_found = any(self._search_in_source(source_dir, pattern) for pattern in pinning_patterns)
-
-        return {
-            "has_cert_pinning": pinning_found,
-            "recommendation": "Implement certificate pinning for critical connections"
-        }
-
-    def _check_network_security_config(self, source_dir: str) -> Dict:
-        """Check network security configuration"""
-        config_found = self._search_in_source(source_dir, "network_security_config")
-
-        return {
-            "has_network_config": config_found,
-            "recommendation": "Use Android Network Security Configuration for additional protection"
-        }
-
-    def _check_proxy_detection(self, source_dir: str) -> Dict:
-        """Check proxy detection implementation"""
-        proxy_patterns = ["proxy", "vpn.*detect", "network.*detection"]
-        proxy_detection = any(self._search_in_source(source_dir, pattern) for pattern in proxy_patterns)
-
-        return {
-            "detects_proxy": proxy_detection,
-            "recommendation": "Consider implementing proxy/VPN detection for sensitive operations"
-        }
-
-    def _issue_to_dict(self, issue: SecurityIssue) -> Dict:
-        """Convert SecurityIssue to dictionary"""
-        return {
-            "category": issue.category,
-            "severity": issue.severity,
-            "title": issue.title,
-            "description": issue.description,
-            "file_path": issue.file_path,
-            "line_number": issue.line_number,
-            "cwe_id": issue.cwe_id,
-            "recommendation": issue.recommendation
-        }
+    def _issues_to_dicts(self, issues: List[SecurityIssue]) -> List[Dict]:
+        """Convert SecurityIssue records to dictionaries for the report"""
+        return [issue._asdict() for issue in issues]
 
     def generate_security_report(self, results: Dict, output_path: str):
         """Generate comprehensive security and compliance report"""
+        generated_at = time.time()
+        flat = self._flatten_results(results)
 
         # Calculate overall security score
-        total_issues = results.get("static_analysis", {}).get("total_issues", 0)
-        critical_issues = results.get("static_analysis", {}).get("critical_issues", 0)
-        high_issues = results.get("static_analysis", {}).get("high_issues", 0)
+        total_issues = flat["static.total_issues"]
+        critical_issues = flat["static.critical_issues"]
+        high_issues = flat["static.high_issues"]
 
-        security_score = max(0, 100 - (critical_issues * 20 + high_issues * 10 + (total_issues - critical_issues - high_issues) * 2))
+        security_score = _security_score(total_issues, critical_issues, high_issues)
 
         report = {
             "summary": {
@@ -878,35 +1189,59 @@ class SecurityComplianceValidator:
                 "total_security_issues": total_issues,
                 "critical_issues": critical_issues,
                 "high_issues": high_issues,
-                "compliance_status": self._calculate_compliance_status(results),
-                "timestamp": time.time()
+                "compliance_status": self._calculate_compliance_status(flat),
+                "timestamp": generated_at
             },
             "detailed_results": results,
-            "recommendations": self._generate_recommendations(results),
-            "compliance_summary": self._generate_compliance_summary(results)
+            "recommendations": self._generate_recommendations(flat),
+            "compliance_summary": self._generate_compliance_summary(flat)
         }
 
-        with open(output_path, 'w') as f:
-            json.dump(report, f, indent=2)
+        _write_json(report, output_path)
 
         # Print summary
         self._print_security_summary(report)
 
         return report
 
-    def _calculate_compliance_status(self, results: Dict) -> str:
+    def _flatten_results(self, results: Dict) -> Dict:
+        """Extract the values the report summary needs, keyed by dotted path"""
+        static_analysis = results.get("static_analysis", {})
+        privacy_scan = results.get("privacy_scan", {})
+        data_collection = privacy_scan.get("data_collection", {})
+
+        flat = {
+            "static.total_issues": static_analysis.get("total_issues", 0),
+            "static.critical_issues": static_analysis.get("critical_issues", 0),
+            "static.high_issues": static_analysis.get("high_issues", 0),
+            "privacy.scanned": bool(privacy_scan),
+            "privacy.data_types_collected": data_collection.get("data_types_collected", []),
+            "privacy.high_risk_data": data_collection.get("high_risk_data", []),
+            "api_security.has_authentication": results.get("api_security", {}).get("authentication", {}).get("has_authentication"),
+            "data_protection.has_encryption": results.get("data_protection", {}).get("encryption_at_rest", {}).get("has_encryption")
+        }
+
+        for framework in ("gdpr", "ccpa", "coppa"):
+            framework_result = privacy_scan.get(framework)
+            # Framework checks return ComplianceResult; reports read back from JSON hold dicts
+            if isinstance(framework_result, dict):
+                status = framework_result.get("status")
+            else:
+                status = getattr(framework_result, "status", None)
+            flat[f"privacy.{framework}_status"] = status or "unknown"
+
+        return flat
+
+    def _calculate_compliance_status(self, flat: Dict) -> str:
         """Calculate overall compliance status"""
-        privacy_results = results.get("privacy_scan", {})
-        if not privacy_results:
+        if not flat["privacy.scanned"]:
             return "unknown"
 
         compliance_frameworks = ["gdpr", "ccpa", "coppa"]
-        compliant_count = 0
-
-        for framework in compliance_frameworks:
-            framework_result = privacy_results.get(framework, {})
-            if isinstance(framework_result, dict) and framework_result.get("status") == "compliant":
-                compliant_count += 1
+        compliant_count = sum(
+            1 for framework in compliance_frameworks
+            if flat[f"privacy.{framework}_status"] == "compliant"
+        )
 
         if compliant_count == len(compliance_frameworks):
             return "fully_compliant"
@@ -915,36 +1250,33 @@ class SecurityComplianceValidator:
         else:
             return "non_compliant"
 
-    def _generate_recommendations(self, results: Dict) -> List[str]:
+    def _generate_recommendations(self, flat: Dict) -> List[str]:
         """Generate security recommendations"""
         recommendations = []
 
-        static_analysis = results.get("static_analysis", {})
-        if static_analysis.get("critical_issues", 0) > 0:
+        if flat["static.critical_issues"] > 0:
             recommendations.append("Address all critical security vulnerabilities immediately")
 
-        if static_analysis.get("high_issues", 0) > 0:
+        if flat["static.high_issues"] > 0:
             recommendations.append("Resolve high-severity security issues before deployment")
 
         # Add specific recommendations based on findings
-        if results.get("api_security", {}).get("authentication", {}).get("has_authentication") is False:
+        if flat["api_security.has_authentication"] is False:
             recommendations.append("Implement proper API authentication")
 
-        if results.get("data_protection", {}).get("encryption_at_rest", {}).get("has_encryption") is False:
+        if flat["data_protection.has_encryption"] is False:
             recommendations.append("Implement data encryption for sensitive information")
 
         return recommendations
 
-    def _generate_compliance_summary(self, results: Dict) -> Dict:
+    def _generate_compliance_summary(self, flat: Dict) -> Dict:
         """Generate compliance summary"""
-        privacy_scan = results.get("privacy_scan", {})
-
         return {
-            "gdpr_status": privacy_scan.get("gdpr", {}).get("status", "unknown"),
-            "ccpa_status": privacy_scan.get("ccpa", {}).get("status", "unknown"),
-            "coppa_status": privacy_scan.get("coppa", {}).get("status", "unknown"),
-            "data_types_collected": privacy_scan.get("data_collection", {}).get("data_types_collected", []),
-            "high_risk_data": privacy_scan.get("data_collection", {}).get("high_risk_data", [])
+            "gdpr_status": flat["privacy.gdpr_status"],
+            "ccpa_status": flat["privacy.ccpa_status"],
+            "coppa_status": flat["privacy.coppa_status"],
+            "data_types_collected": flat["privacy.data_types_collected"],
+            "high_risk_data": flat["privacy.high_risk_data"]
         }
 
     def _print_security_summary(self, report: Dict):
@@ -957,7 +1289,7 @@ class SecurityComplianceValidator:
         print(f"🚨 Total Security Issues: {summary['total_security_issues']}")
         print(f"🔴 Critical Issues: {summary['critical_issues']}")
         print(f"🟡 High Severity Issues: {summary['high_issues']}")
-        print(f"📋 Compliance Status: {summary['compliance_status'].replace('_', ' ').title()}")
+        print(f"📋 Compliance Status: {_status_label(summary['compliance_status'])}")
 
         if report.get("recommendations"):
             print("\n📋 Key Recommendations:")
@@ -967,9 +1299,9 @@ class SecurityComplianceValidator:
         compliance_summary = report.get("compliance_summary", {})
         if compliance_summary:
             print(f"\n🌐 Privacy Compliance:")
-            print(f"  GDPR: {compliance_summary.get('gdpr_status', 'unknown').title()}")
-            print(f"  CCPA: {compliance_summary.get('ccpa_status', 'unknown').title()}")
-            print(f"  COPPA: {compliance_summary.get('coppa_status', 'unknown').title()}")
+            print(f"  GDPR: {_status_label(compliance_summary.get('gdpr_status', 'unknown'))}")
+            print(f"  CCPA: {_status_label(compliance_summary.get('ccpa_status', 'unknown'))}")
+            print(f"  COPPA: {_status_label(compliance_summary.get('coppa_status', 'unknown'))}")
 
 def main():
     parser = argparse.ArgumentParser(description='Run comprehensive security and compliance analysis')
@@ -5,22 +5,292 @@ Sets up comprehensive monitoring and observability infrastructure
 """
 
 import argparse
+import asyncio
+import contextlib
+import functools
+import hashlib
 import json
 import logging
 import os
+import re
+import sqlite3
 import sys
+import threading
 import time
-from typing import Dict, List, Optional
+import yaml
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
-import requests
+from functools import cached_property
+from google.api import label_pb2, metric_pb2
+from google.api_core.exceptions import NotFound
+from google.cloud import monitoring_dashboard_v1
 from google.cloud import monitoring_v3
+from google.cloud.monitoring_v3.services.alert_policy_service.transports import AlertPolicyServiceGrpcTransport
+from google.cloud.monitoring_v3.services.metric_service.transports import MetricServiceGrpcTransport
 from google.cloud import logging as cloud_logging
+from google.protobuf import duration_pb2
+from google.protobuf.json_format import MessageToJson, ParseDict
 import firebase_admin
-from firebase_admin import credentials, analytics
+from firebase_admin import credentials
+
+try:
+    import jinja2
+except ImportError:
+    jinja2 = None
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Create RPCs are network-bound and independent; issue up to this many at once
+_RPC_WORKERS = 8
+
+# The metric and alert policy clients share one channel to the monitoring
+# endpoint. HTTP/2 multiplexes the concurrent calls over it, and keepalive
+# pings stop it going idle between bursts, so no call pays for a new
+# TCP/TLS handshake.
+_MONITORING_ENDPOINT = "monitoring.googleapis.com:443"
+_MONITORING_CHANNEL_OPTIONS = (
+    ("grpc.max_send_message_length", -1),
+    ("grpc.max_receive_message_length", -1),
+    ("grpc.keepalive_time_ms", 30000),
+    ("grpc.http2.max_pings_without_data", 0)
+)
+
+# Custom Firebase Analytics events the app reports
+_FIREBASE_EVENTS = (
+    "pose_detection_started",
+    "pose_detection_completed",
+    "pose_accuracy_measured",
+    "user_session_started",
+    "user_session_ended",
+    "coaching_session_completed",
+    "ai_feedback_provided"
+)
+
+_FIREBASE_CREDENTIAL_PATH = "firebase-service-account.json"
+
+# Full notification channel resource name, as passed to --alert-channels
+_CHANNEL_RE = re.compile(r"^projects/[^/]+/notificationChannels/\d+$")
+
+@functools.lru_cache(maxsize=1)
+def _firebase_credential():
+    """Load and parse the Firebase service account key once per process"""
+    return credentials.Certificate(_FIREBASE_CREDENTIAL_PATH)
+
+class _WriteThrottle:
+    """Blocking token bucket shared by the threads issuing write RPCs"""
+
+    def __init__(self, rate: int, period: float):
+        self._capacity = rate
+        self._tokens = float(rate)
+        self._fill_rate = rate / period
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._fill_rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self._fill_rate
+            time.sleep(wait)
+
+# Metric descriptor and alert policy creation count against per-project
+# configuration-change quotas; pacing the writes avoids RESOURCE_EXHAUSTED
+# retry storms when several environments deploy at once
+_MONITORING_WRITES = _WriteThrottle(rate=30, period=60.0)
+
+# Records, per project, a hash of each descriptor, alert policy and log metric
+# definition already created, so re-runs skip RPCs for unchanged definitions
+_MANIFEST_PATH = os.path.join(os.path.expanduser("~"), ".pose-coach", "monitoring-descriptors.json")
+
+# Monitoring windows started by this script, one row per environment and
+# version; WAL mode lets pollers read while a deployment writes
+_STATE_DB_PATH = "monitoring_state.db"
+
+# Where --mode terraform writes its files unless --emit-terraform names a directory
+_TERRAFORM_DIR = "monitoring-terraform"
+
+# Declarative definitions of the metrics, alert policies, log metrics and
+# dashboard this script creates
+_SPEC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "monitoring-spec.yaml")
+
+@functools.lru_cache(maxsize=None)
+def _load_spec(path: str) -> Dict:
+    """Parse a monitoring spec file once, with the libyaml loader when available"""
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with open(path) as f:
+        return yaml.load(f, Loader=loader)
+
+def _render(value, fields: Dict):
+    """Fill the {placeholders} in every string of a spec value"""
+    if isinstance(value, str):
+        return value.format_map(fields)
+    if isinstance(value, dict):
+        return {key: _render(item, fields) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_render(item, fields) for item in value]
+    return value
+
+@functools.lru_cache(maxsize=None)
+def _label_descriptor(key: str, value_type: str):
+    """Return the LabelDescriptor for a label, built once and shared by all metrics"""
+    return label_pb2.LabelDescriptor(key=key, value_type=label_pb2.LabelDescriptor.ValueType.Value(value_type))
+
+@functools.lru_cache(maxsize=None)
+def _duration(value: str) -> duration_pb2.Duration:
+    """Return the Duration for a spec value such as "300s", parsed once per value"""
+    return duration_pb2.Duration(seconds=int(value.rstrip('s')))
+
+@functools.lru_cache(maxsize=None)
+def _aggregation(alignment_period: str, per_series_aligner: str):
+    """Return the Aggregation for an alignment period and aligner, built once"""
+    return monitoring_v3.Aggregation(
+        alignment_period=_duration(alignment_period),
+        per_series_aligner=monitoring_v3.Aggregation.Aligner[per_series_aligner]
+    )
+
+def _dashboard(dashboard_config: Dict):
+    """Build a Dashboard, widgets included, from its spec definition"""
+    dashboard = monitoring_dashboard_v1.Dashboard()
+    ParseDict(dashboard_config, monitoring_dashboard_v1.Dashboard.pb(dashboard), ignore_unknown_fields=True)
+    return dashboard
+
+def _definition_hash(definition) -> str:
+    """Return a stable hash of a JSON-serializable resource definition"""
+    return hashlib.sha1(json.dumps(definition, sort_keys=True).encode()).hexdigest()
+
+# Terraform equivalents of the resources created over RPC in --mode rpc.
+# Applying them lets terraform diff against the project state instead of
+# this script issuing a call per resource on every run.
+_TERRAFORM_TEMPLATES = {
+    "metric_descriptors.tf": """\
+{% for metric in metrics %}
+resource "google_monitoring_metric_descriptor" "{{ metric["type"] | tf_name }}" {
+  project      = {{ project_id | hcl }}
+  type         = {{ metric["type"] | hcl }}
+  display_name = {{ metric["description"] | hcl }}
+  description  = {{ metric["description"] | hcl }}
+  metric_kind  = {{ metric["metric_kind"] | hcl }}
+  value_type   = {{ metric["value_type"] | hcl }}
+  unit         = {{ metric["unit"] | hcl }}
+{% for label in metric["labels"] %}
+
+  labels {
+    key        = {{ label["key"] | hcl }}
+    value_type = {{ label["value_type"] | hcl }}
+  }
+{% endfor %}
+}
+
+{% endfor %}
+""",
+    "alert_policies.tf": """\
+{% for policy in policies %}
+resource "google_monitoring_alert_policy" "{{ policy["display_name"] | tf_name }}" {
+  project               = {{ project_id | hcl }}
+  display_name          = {{ policy["display_name"] | hcl }}
+  combiner              = "OR"
+  enabled               = true
+  notification_channels = {{ notification_channels | hcl }}
+{% for condition in policy["conditions"] %}
+{% set threshold = condition["condition_threshold"] %}
+
+  conditions {
+    display_name = {{ condition["display_name"] | hcl }}
+
+    condition_threshold {
+      filter          = {{ threshold["filter"] | hcl }}
+      comparison      = {{ threshold["comparison"] | hcl }}
+      threshold_value = {{ threshold["threshold_value"] | hcl }}
+      duration        = {{ threshold["duration"] | hcl }}
+{% for aggregation in threshold["aggregations"] %}
+
+      aggregations {
+        alignment_period   = {{ aggregation["alignment_period"] | hcl }}
+        per_series_aligner = {{ aggregation["per_series_aligner"] | hcl }}
+      }
+{% endfor %}
+    }
+  }
+{% endfor %}
+{% if "alert_strategy" in policy %}
+{% set strategy = policy["alert_strategy"] %}
+
+  alert_strategy {
+{% if "notification_rate_limit" in strategy %}
+    notification_rate_limit {
+      period = {{ strategy["notification_rate_limit"]["period"] | hcl }}
+    }
+{% endif %}
+{% if "auto_close" in strategy %}
+    auto_close = {{ strategy["auto_close"] | hcl }}
+{% endif %}
+  }
+{% endif %}
+}
+
+{% endfor %}
+""",
+    "log_metrics.tf": """\
+{% for metric in log_metrics %}
+resource "google_logging_metric" "{{ metric["name"] | tf_name }}" {
+  project     = {{ project_id | hcl }}
+  name        = {{ metric["name"] | hcl }}
+  description = {{ metric["description"] | hcl }}
+  filter      = {{ metric["filter"] | hcl }}
+
+  metric_descriptor {
+    metric_kind = {{ metric["metric_descriptor"]["metric_kind"] | hcl }}
+    value_type  = {{ metric["metric_descriptor"]["value_type"] | hcl }}
+  }
+}
+
+{% endfor %}
+""",
+    "dashboards.tf": """\
+resource "google_monitoring_dashboard" "pose_coach" {
+  project        = {{ project_id | hcl }}
+  dashboard_json = <<-EOT
+{{ dashboard_json | hcl_escape }}
+  EOT
+}
+"""
+}
+
+def _hcl_escape(text: str) -> str:
+    """Escape HCL template sequences so text is taken literally"""
+    return text.replace("${", "$${").replace("%{", "%%{")
+
+def _hcl(value) -> str:
+    """Render a string, number or list as an HCL literal"""
+    return _hcl_escape(json.dumps(value))
+
+def _tf_name(value: str) -> str:
+    """Derive a terraform resource name from a metric type or display name"""
+    return re.sub(r"[^a-z0-9]+", "_", value.rsplit("/", 1)[-1].lower()).strip("_")
+
+@functools.lru_cache(maxsize=1)
+def _terraform_env():
+    """Return the jinja2 environment for the terraform templates"""
+    env = jinja2.Environment(
+        loader=jinja2.DictLoader(_TERRAFORM_TEMPLATES),
+        trim_blocks=True,
+        lstrip_blocks=True,
+        keep_trailing_newline=True,
+        undefined=jinja2.StrictUndefined
+    )
+    env.filters["hcl"] = _hcl
+    env.filters["hcl_escape"] = _hcl_escape
+    env.filters["tf_name"] = _tf_name
+    return env
+
 @dataclass
 class MonitoringConfig:
     """Monitoring configuration"""
@@ -30,405 +300,392 @@ class MonitoringConfig:
     alert_channels: List[str]
     metrics_config: Dict
     dashboards: List[str]
+    create_descriptors: bool = False
+
+@dataclass(frozen=True)
+class SloSpec:
+    """Service level objectives stored column-wise, one entry per SLO"""
+    names: Tuple[str, ...]
+    descriptions: Tuple[str, ...]
+    thresholds: Tuple[float, ...]
+    targets: Tuple[float, ...]
+
+_SLOS = SloSpec(
+    names=("pose_detection_latency_slo", "pose_accuracy_slo", "app_availability_slo"),
+    descriptions=(
+        "Pose detection should complete within 200ms for 95% of requests",
+        "Pose accuracy should be above 85% for 99% of detections",
+        "App should be available 99.9% of the time"
+    ),
+    thresholds=(200, 0.85, 0.999),  # ms, accuracy, availability
+    targets=(0.95, 0.99, 0.999)
+)
 
 class MonitoringSetup:
     """Sets up monitoring infrastructure for deployments"""
 
     def __init__(self, project_id: str):
         self.project_id = project_id
-        self.monitoring_client = monitoring_v3.MetricServiceClient()
-        self.logging_client = cloud_logging.Client()
         self.project_name = f"projects/{project_id}"
-
-    def setup_application_monitoring(self, config: MonitoringConfig):
+        self._manifest = None
+        self._descriptor_cache = {}
+        self._spec_cache = {}
+        # Setup steps run concurrently and share the manifest
+        self._manifest_lock = threading.Lock()
+
+    # Each client opens its own channel on creation, so clients are created
+    # on first use and then reused; steps that never run never connect.
+    # Resolve a client before handing it to worker threads.
+
+    @cached_property
+    def monitoring_channel(self):
+        """gRPC channel shared by the metric and alert policy clients"""
+        return MetricServiceGrpcTransport.create_channel(
+            _MONITORING_ENDPOINT,
+            options=list(_MONITORING_CHANNEL_OPTIONS)
+        )
+
+    @cached_property
+    def monitoring_client(self):
+        """Metric descriptor client, created on first use"""
+        return monitoring_v3.MetricServiceClient(
+            transport=MetricServiceGrpcTransport(channel=self.monitoring_channel)
+        )
+
+    @cached_property
+    def alert_client(self):
+        """Alert policy client, created on first use"""
+        return monitoring_v3.AlertPolicyServiceClient(
+            transport=AlertPolicyServiceGrpcTransport(channel=self.monitoring_channel)
+        )
+
+    @cached_property
+    def dashboard_client(self):
+        """Dashboard client, created on first use"""
+        return monitoring_dashboard_v1.DashboardsServiceClient()
+
+    @cached_property
+    def logging_client(self):
+        """Cloud Logging client, created on first use"""
+        return cloud_logging.Client()
+
+    async def setup_application_monitoring(self, config: MonitoringConfig):
         """Set up comprehensive application monitoring"""
         logger.info(f"Setting up monitoring for {config.environment} v{config.version}")
 
-        # Create custom metrics
-        self._create_custom_metrics(config)
+        # The steps are independent blocking client calls, so they run side
+        # by side on worker threads; total time is the slowest step, not the sum
+        await asyncio.gather(
+            # Create custom metrics, then the alerting policies that watch them
+            asyncio.to_thread(self._setup_metrics_and_alerts, config),
 
-        # Set up alerting policies
-        self._setup_alerting_policies(config)
+            # Configure log-based metrics
+            asyncio.to_thread(self._setup_log_metrics, config),
 
-        # Configure log-based metrics
-        self._setup_log_metrics(config)
+            # Create monitoring dashboards
+            asyncio.to_thread(self._create_dashboards, config),
 
-        # Create monitoring dashboards
-        self._create_dashboards(config)
+            # Initialize real-time monitoring
+            asyncio.to_thread(self._start_realtime_monitoring, config)
+        )
 
-        # Initialize real-time monitoring
-        self._start_realtime_monitoring(config)
+    def _setup_metrics_and_alerts(self, config: MonitoringConfig):
+        """Create custom metrics and then the alerting policies on them"""
+        self._create_custom_metrics(config)
+        self._setup_alerting_policies(config)
 
-    def _create_custom_metrics(self, config: MonitoringConfig):
-        """Create custom metrics for the application"""
-        custom_metrics = [
-            {
-                "type": "custom.googleapis.com/pose_coach/pose_detection_latency",
-                "labels": [
-                    {"key": "environment", "value_type": "STRING"},
-                    {"key": "version", "value_type": "STRING"},
-                    {"key": "device_model", "value_type": "STRING"}
-                ],
-                "metric_kind": "GAUGE",
-                "value_type": "DOUBLE",
-                "unit": "ms",
-                "description": "Pose detection inference latency"
-            },
-            {
-                "type": "custom.googleapis.com/pose_coach/pose_accuracy",
-                "labels": [
-                    {"key": "environment", "value_type": "STRING"},
-                    {"key": "version", "value_type": "STRING"},
-                    {"key": "pose_type", "value_type": "STRING"}
-                ],
-                "metric_kind": "GAUGE",
-                "value_type": "DOUBLE",
-                "unit": "1",
-                "description": "Pose detection accuracy score"
-            },
-            {
-                "type": "custom.googleapis.com/pose_coach/app_startup_time",
-                "labels": [
-                    {"key": "environment", "value_type": "STRING"},
-                    {"key": "version", "value_type": "STRING"},
-                    {"key": "startup_type", "value_type": "STRING"}
-                ],
-                "metric_kind": "GAUGE",
-                "value_type": "DOUBLE",
-                "unit": "ms",
-                "description": "Application startup time"
-            },
-            {
-                "type": "custom.googleapis.com/pose_coach/memory_usage",
-                "labels": [
-                    {"key": "environment", "value_type": "STRING"},
-                    {"key": "version", "value_type": "STRING"},
-                    {"key": "memory_type", "value_type": "STRING"}
-                ],
-                "metric_kind": "GAUGE",
-                "value_type": "DOUBLE",
-                "unit": "MB",
-                "description": "Memory usage by type"
-            },
-            {
-                "type": "custom.googleapis.com/pose_coach/user_session_duration",
-                "labels": [
-                    {"key": "environment", "value_type": "STRING"},
-                    {"key": "version", "value_type": "STRING"},
-                    {"key": "session_type", "value_type": "STRING"}
-                ],
-                "metric_kind": "GAUGE",
-                "value_type": "DOUBLE",
-                "unit": "s",
-                "description": "User session duration"
-            },
-            {
-                "type": "custom.googleapis.com/pose_coach/api_response_time",
-                "labels": [
-                    {"key": "environment", "value_type": "STRING"},
-                    {"key": "version", "value_type": "STRING"},
-                    {"key": "endpoint", "value_type": "STRING"}
-                ],
-                "metric_kind": "GAUGE",
-                "value_type": "DOUBLE",
-                "unit": "ms",
-                "description": "API response time by endpoint"
+    def _spec(self, config: MonitoringConfig, section: str):
+        """Return one section of the monitoring spec rendered for a deployment
+
+        Sections are rendered once per environment and version; callers must
+        not modify the result.
+        """
+        key = (section, config.environment, config.version)
+        rendered = self._spec_cache.get(key)
+        if rendered is None:
+            fields = {
+                "environment": config.environment,
+                "environment_title": config.environment.title(),
+                "version": config.version
             }
-        ]
+            rendered = self._spec_cache[key] = _render(_load_spec(_SPEC_PATH)[section], fields)
+        return rendered
 
-        for metric_def in custom_metrics:
-            try:
-                descriptor = monitoring_v3.MetricDescriptor()
-                descriptor.type = metric_def["type"]
-                descriptor.metric_kind = getattr(monitoring_v3.MetricDescriptor.MetricKind, metric_def["metric_kind"])
-                descriptor.value_type = getattr(monitoring_v3.MetricDescriptor.ValueType, metric_def["value_type"])
-                descriptor.unit = metric_def["unit"]
-                descriptor.description = metric_def["description"]
-
-                for label in metric_def["labels"]:
-                    label_descriptor = descriptor.labels.add()
-                    label_descriptor.key = label["key"]
-                    label_descriptor.value_type = getattr(monitoring_v3.LabelDescriptor.ValueType, label["value_type"])
-
-                request = monitoring_v3.CreateMetricDescriptorRequest(
-                    name=self.project_name,
-                    metric_descriptor=descriptor
-                )
+    def _manifest_entries(self) -> Dict[str, str]:
+        """Return this project's created-resource hashes, loading the manifest once
 
-                self.monitoring_client.create_metric_descriptor(request=request)
-                logger.info(f"Created custom metric: {metric_def['type']}")
+        Callers must hold self._manifest_lock.
+        """
+        if self._manifest is None:
+            try:
+                with open(_MANIFEST_PATH) as f:
+                    self._manifest = json.load(f)
+            except (OSError, ValueError):
+                self._manifest = {}
+        return self._manifest.setdefault(self.project_id, {})
+
+    def _is_recorded(self, kind: str, name: str, definition) -> bool:
+        """Check whether this exact definition was already created"""
+        with self._manifest_lock:
+            return self._manifest_entries().get(f"{kind}:{name}") == _definition_hash(definition)
+
+    def _has_record(self, kind: str, name: str) -> bool:
+        """Check whether any definition of this resource was recorded before"""
+        with self._manifest_lock:
+            return f"{kind}:{name}" in self._manifest_entries()
+
+    def _record_created(self, kind: str, name: str, definition):
+        """Remember that this definition now exists in the project"""
+        with self._manifest_lock:
+            self._manifest_entries()[f"{kind}:{name}"] = _definition_hash(definition)
+
+    def _save_manifest(self):
+        """Atomically write the created-resource manifest"""
+        with self._manifest_lock:
+            if self._manifest is None:
+                return
+            tmp_path = f"{_MANIFEST_PATH}.tmp"
+            try:
+                os.makedirs(os.path.dirname(_MANIFEST_PATH), exist_ok=True)
+                with open(tmp_path, 'w') as f:
+                    json.dump(self._manifest, f, indent=2, sort_keys=True)
+                os.replace(tmp_path, _MANIFEST_PATH)
+            except OSError as e:
+                logger.warning(f"Could not save monitoring manifest {_MANIFEST_PATH}: {e}")
 
-            except Exception as e:
-                if "already exists" not in str(e):
-                    logger.error(f"Failed to create metric {metric_def['type']}: {e}")
+    def _create_custom_metrics(self, config: MonitoringConfig):
+        """Create custom metrics for the application"""
+        # Cloud Monitoring creates custom metric descriptors from the first
+        # time series written, so explicit creation is opt-in; the definitions
+        # in the monitoring spec stay the reference for those metrics
+        if not config.create_descriptors:
+            logger.info("Skipping metric descriptor creation (enable with --create-descriptors)")
+            return
+
+        custom_metrics = self._spec(config, "custom_metrics")
+
+        pending = [metric_def for metric_def in custom_metrics
+                   if not self._is_recorded("metric_descriptor", metric_def["type"], metric_def)]
+        monitoring_client = self.monitoring_client if pending else None
+
+        with ThreadPoolExecutor(max_workers=_RPC_WORKERS) as executor:
+            futures = {executor.submit(self._submit_descriptor, monitoring_client, metric_def): metric_def
+                       for metric_def in pending}
+            for future in as_completed(futures):
+                metric_def = futures[future]
+                try:
+                    created = future.result()
+                except Exception as e:
+                    if "already exists" not in str(e):
+                        logger.error(f"Failed to create metric {metric_def['type']}: {e}")
+                        continue
+                    created = False
+                if created:
+                    logger.info(f"Created custom metric: {metric_def['type']}")
+                elif self._has_record("metric_descriptor", metric_def["type"]):
+                    # Created by an earlier run from another definition;
+                    # descriptors are not updated in place, so it stays
+                    # unrecorded and is reported until the two agree
+                    logger.warning(f"Custom metric differs from the spec and cannot be updated: {metric_def['type']}")
+                    continue
+                else:
+                    # First seen here; record it so later runs skip the GET
+                    logger.info(f"Custom metric already exists: {metric_def['type']}")
+                self._record_created("metric_descriptor", metric_def["type"], metric_def)
+
+        self._save_manifest()
+
+    def _descriptor_exists(self, monitoring_client, metric_type: str) -> bool:
+        """Check with a GET whether a metric descriptor exists, once per metric type"""
+        exists = self._descriptor_cache.get(metric_type)
+        if exists is None:
+            try:
+                monitoring_client.get_metric_descriptor(name=f"{self.project_name}/metricDescriptors/{metric_type}")
+                exists = True
+            except NotFound:
+                exists = False
+            self._descriptor_cache[metric_type] = exists
+        return exists
+
+    def _submit_descriptor(self, monitoring_client, metric_def: Dict) -> bool:
+        """Create a metric descriptor unless it exists; return whether it was created"""
+        if self._descriptor_exists(monitoring_client, metric_def["type"]):
+            return False
+
+        descriptor = metric_pb2.MetricDescriptor(
+            type=metric_def["type"],
+            metric_kind=metric_pb2.MetricDescriptor.MetricKind.Value(metric_def["metric_kind"]),
+            value_type=metric_pb2.MetricDescriptor.ValueType.Value(metric_def["value_type"]),
+            unit=metric_def["unit"],
+            description=metric_def["description"],
+            labels=[_label_descriptor(label["key"], label["value_type"]) for label in metric_def["labels"]]
+        )
+
+        request = monitoring_v3.CreateMetricDescriptorRequest(
+            name=self.project_name,
+            metric_descriptor=descriptor
+        )
+
+        _MONITORING_WRITES.acquire()
+        monitoring_client.create_metric_descriptor(request=request)
+        self._descriptor_cache[metric_def["type"]] = True
+        return True
 
     def _setup_alerting_policies(self, config: MonitoringConfig):
         """Set up alerting policies for critical metrics"""
-        alert_client = monitoring_v3.AlertPolicyServiceClient()
-
-        alerting_policies = [
-            {
-                "display_name": f"Pose Coach - High Error Rate ({config.environment})",
-                "conditions": [{
-                    "display_name": "Error rate above threshold",
-                    "condition_threshold": {
-                        "filter": f'resource.type="gce_instance" AND metric.type="logging.googleapis.com/log_entry_count" AND metric.labels.severity="ERROR"',
-                        "comparison": "COMPARISON_GREATER_THAN",
-                        "threshold_value": 10,
-                        "duration": "300s",
-                        "aggregations": [{
-                            "alignment_period": "60s",
-                            "per_series_aligner": "ALIGN_RATE"
-                        }]
-                    }
-                }],
-                "alert_strategy": {
-                    "notification_rate_limit": {
-                        "period": "300s"
-                    },
-                    "auto_close": "1800s"
-                }
-            },
-            {
-                "display_name": f"Pose Coach - High Latency ({config.environment})",
-                "conditions": [{
-                    "display_name": "Pose detection latency above threshold",
-                    "condition_threshold": {
-                        "filter": f'metric.type="custom.googleapis.com/pose_coach/pose_detection_latency" AND metric.labels.environment="{config.environment}"',
-                        "comparison": "COMPARISON_GREATER_THAN",
-                        "threshold_value": 500,  # 500ms
-                        "duration": "300s",
-                        "aggregations": [{
-                            "alignment_period": "60s",
-                            "per_series_aligner": "ALIGN_MEAN"
-                        }]
-                    }
-                }]
-            },
-            {
-                "display_name": f"Pose Coach - Low Accuracy ({config.environment})",
-                "conditions": [{
-                    "display_name": "Pose accuracy below threshold",
-                    "condition_threshold": {
-                        "filter": f'metric.type="custom.googleapis.com/pose_coach/pose_accuracy" AND metric.labels.environment="{config.environment}"',
-                        "comparison": "COMPARISON_LESS_THAN",
-                        "threshold_value": 0.8,  # 80% accuracy
-                        "duration": "600s",
-                        "aggregations": [{
-                            "alignment_period": "300s",
-                            "per_series_aligner": "ALIGN_MEAN"
-                        }]
-                    }
-                }]
-            },
-            {
-                "display_name": f"Pose Coach - High Memory Usage ({config.environment})",
-                "conditions": [{
-                    "display_name": "Memory usage above threshold",
-                    "condition_threshold": {
-                        "filter": f'metric.type="custom.googleapis.com/pose_coach/memory_usage" AND metric.labels.environment="{config.environment}"',
-                        "comparison": "COMPARISON_GREATER_THAN",
-                        "threshold_value": 512,  # 512MB
-                        "duration": "600s",
-                        "aggregations": [{
-                            "alignment_period": "60s",
-                            "per_series_aligner": "ALIGN_MEAN"
-                        }]
-                    }
-                }]
-            }
-        ]
-
-        for policy_config in alerting_policies:
+        alerting_policies = self._spec(config, "alert_policies")
+
+        # The notification channels are part of what gets created
+        definitions = {policy_config["display_name"]: {**policy_config, "notification_channels": config.alert_channels}
+                       for policy_config in alerting_policies}
+        pending = [policy_config for policy_config in alerting_policies
+                   if not self._is_recorded("alert_policy", policy_config["display_name"],
+                                            definitions[policy_config["display_name"]])]
+        alert_client = self.alert_client if pending else None
+
+        # Creating a policy never fails on a duplicate display name; it makes
+        # a second copy. One list call tells which ones already exist; those
+        # are updated in place to the current definition instead.
+        existing = {}
+        if pending:
             try:
-                policy = monitoring_v3.AlertPolicy()
-                policy.display_name = policy_config["display_name"]
-                policy.enabled = True
-
-                # Add conditions
-                for condition_config in policy_config["conditions"]:
-                    condition = policy.conditions.add()
-                    condition.display_name = condition_config["display_name"]
-
-                    # Set up threshold condition
-                    threshold = condition_config["condition_threshold"]
-                    condition.condition_threshold.filter = threshold["filter"]
-                    condition.condition_threshold.comparison = getattr(
-                        monitoring_v3.ComparisonType, threshold["comparison"]
-                    )
-                    condition.condition_threshold.threshold_value.double_value = threshold["threshold_value"]
-                    condition.condition_threshold.duration.seconds = int(threshold["duration"].rstrip('s'))
-
-                    # Add aggregations
-                    for agg_config in threshold["aggregations"]:
-                        aggregation = condition.condition_threshold.aggregations.add()
-                        aggregation.alignment_period.seconds = int(agg_config["alignment_period"].rstrip('s'))
-                        aggregation.per_series_aligner = getattr(
-                            monitoring_v3.Aggregation.Aligner, agg_config["per_series_aligner"]
-                        )
-
-                # Add notification channels
-                for channel in config.alert_channels:
-                    policy.notification_channels.append(channel)
-
-                # Set alert strategy
-                if "alert_strategy" in policy_config:
-                    strategy = policy_config["alert_strategy"]
-                    if "notification_rate_limit" in strategy:
-                        policy.alert_strategy.notification_rate_limit.period.seconds = int(
-                            strategy["notification_rate_limit"]["period"].rstrip('s')
-                        )
-                    if "auto_close" in strategy:
-                        policy.alert_strategy.auto_close.seconds = int(
-                            strategy["auto_close"].rstrip('s')
-                        )
-
-                request = monitoring_v3.CreateAlertPolicyRequest(
-                    name=self.project_name,
-                    alert_policy=policy
-                )
-
-                created_policy = alert_client.create_alert_policy(request=request)
-                logger.info(f"Created alert policy: {policy.display_name}")
-
+                existing = {policy.display_name: policy.name
+                            for policy in alert_client.list_alert_policies(name=self.project_name)}
             except Exception as e:
-                logger.error(f"Failed to create alert policy {policy_config['display_name']}: {e}")
+                logger.warning(f"Could not list existing alert policies: {e}")
+
+        with ThreadPoolExecutor(max_workers=_RPC_WORKERS) as executor:
+            futures = {executor.submit(self._submit_alert_policy, alert_client, policy_config, config,
+                                       existing.get(policy_config["display_name"])): policy_config
+                       for policy_config in pending}
+            for future in as_completed(futures):
+                policy_config = futures[future]
+                action = "update" if policy_config["display_name"] in existing else "create"
+                try:
+                    future.result()
+                    logger.info(f"{action.title()}d alert policy: {policy_config['display_name']}")
+                except Exception as e:
+                    logger.error(f"Failed to {action} alert policy {policy_config['display_name']}: {e}")
+                    continue
+                self._record_created("alert_policy", policy_config["display_name"],
+                                     definitions[policy_config["display_name"]])
+
+        self._save_manifest()
+
+    def _submit_alert_policy(self, alert_client, policy_config: Dict, config: MonitoringConfig,
+                             existing_name: Optional[str] = None):
+        """Build an alert policy from its definition and create it, or replace existing_name with it"""
+        policy = monitoring_v3.AlertPolicy()
+        policy.display_name = policy_config["display_name"]
+        policy.enabled = True
+
+        # Add conditions
+        for condition_config in policy_config["conditions"]:
+            # Set up threshold condition
+            threshold = condition_config["condition_threshold"]
+            condition = monitoring_v3.AlertPolicy.Condition(
+                display_name=condition_config["display_name"],
+                condition_threshold=monitoring_v3.AlertPolicy.Condition.MetricThreshold(
+                    filter=threshold["filter"],
+                    comparison=monitoring_v3.ComparisonType[threshold["comparison"]],
+                    threshold_value=threshold["threshold_value"],
+                    duration=_duration(threshold["duration"]),
+                    aggregations=[
+                        _aggregation(agg_config["alignment_period"], agg_config["per_series_aligner"])
+                        for agg_config in threshold["aggregations"]
+                    ]
+                )
+            )
+            policy.conditions.append(condition)
+
+        # Add notification channels
+        for channel in config.alert_channels:
+            policy.notification_channels.append(channel)
+
+        # Set alert strategy
+        if "alert_strategy" in policy_config:
+            strategy = policy_config["alert_strategy"]
+            if "notification_rate_limit" in strategy:
+                policy.alert_strategy.notification_rate_limit.period = _duration(
+                    strategy["notification_rate_limit"]["period"]
+                )
+            if "auto_close" in strategy:
+                policy.alert_strategy.auto_close = _duration(strategy["auto_close"])
+
+        _MONITORING_WRITES.acquire()
+        if existing_name:
+            # Without an update mask the whole policy is replaced
+            policy.name = existing_name
+            alert_client.update_alert_policy(request=monitoring_v3.UpdateAlertPolicyRequest(alert_policy=policy))
+            return
+
+        request = monitoring_v3.CreateAlertPolicyRequest(
+            name=self.project_name,
+            alert_policy=policy
+        )
+        alert_client.create_alert_policy(request=request)
 
     def _setup_log_metrics(self, config: MonitoringConfig):
         """Set up log-based metrics"""
-        log_metrics = [
-            {
-                "name": f"pose_coach_errors_{config.environment}",
-                "description": f"Error count for {config.environment}",
-                "filter": f'resource.type="gce_instance" AND severity="ERROR" AND labels.environment="{config.environment}"',
-                "metric_descriptor": {
-                    "metric_kind": "DELTA",
-                    "value_type": "INT64"
-                }
-            },
-            {
-                "name": f"pose_coach_crashes_{config.environment}",
-                "description": f"Crash count for {config.environment}",
-                "filter": f'resource.type="gce_instance" AND textPayload:"FATAL" AND labels.environment="{config.environment}"',
-                "metric_descriptor": {
-                    "metric_kind": "DELTA",
-                    "value_type": "INT64"
-                }
-            },
-            {
-                "name": f"pose_coach_api_errors_{config.environment}",
-                "description": f"API error count for {config.environment}",
-                "filter": f'resource.type="gce_instance" AND httpRequest.status>=400 AND labels.environment="{config.environment}"',
-                "metric_descriptor": {
-                    "metric_kind": "DELTA",
-                    "value_type": "INT64"
-                }
-            }
-        ]
-
-        for metric_config in log_metrics:
-            try:
-                metric = cloud_logging.Metric(
-                    self.logging_client,
-                    name=metric_config["name"],
-                    filter_=metric_config["filter"],
-                    description=metric_config["description"]
-                )
+        log_metrics = self._spec(config, "log_metrics")
 
-                if not metric.exists():
-                    metric.create()
-                    logger.info(f"Created log metric: {metric_config['name']}")
+        pending = [metric_config for metric_config in log_metrics
+                   if not self._is_recorded("log_metric", metric_config["name"], metric_config)]
+        logging_client = self.logging_client if pending else None
 
+        # One list call replaces an exists() round trip per metric; metrics
+        # that exist are updated to the current definition
+        existing = set()
+        if pending:
+            try:
+                existing = {metric.name for metric in logging_client.list_metrics()}
             except Exception as e:
-                logger.error(f"Failed to create log metric {metric_config['name']}: {e}")
+                logger.warning(f"Could not list existing log metrics: {e}")
+
+        with ThreadPoolExecutor(max_workers=_RPC_WORKERS) as executor:
+            futures = {executor.submit(self._submit_log_metric, logging_client, metric_config,
+                                       metric_config["name"] in existing): metric_config
+                       for metric_config in pending}
+            for future in as_completed(futures):
+                metric_config = futures[future]
+                action = "update" if metric_config["name"] in existing else "create"
+                try:
+                    future.result()
+                    logger.info(f"{action.title()}d log metric: {metric_config['name']}")
+                except Exception as e:
+                    logger.error(f"Failed to {action} log metric {metric_config['name']}: {e}")
+                    continue
+                self._record_created("log_metric", metric_config["name"], metric_config)
+
+        self._save_manifest()
+
+    def _submit_log_metric(self, logging_client, metric_config: Dict, exists: bool = False):
+        """Create a log-based metric from its definition, or update the existing one"""
+        metric = logging_client.metric(
+            metric_config["name"],
+            filter_=metric_config["filter"],
+            description=metric_config["description"]
+        )
+        if exists:
+            metric.update()
+        else:
+            metric.create()
 
     def _create_dashboards(self, config: MonitoringConfig):
         """Create monitoring dashboards"""
-        dashboard_client = monitoring_v3.DashboardsServiceClient()
-
-        dashboard_config = {
-            "display_name": f"Pose Coach - {config.environment.title()} v{config.version}",
-            "grid_layout": {
-                "widgets": [
-                    {
-                        "title": "Pose Detection Latency",
-                        "xy_chart": {
-                            "data_sets": [{
-                                "time_series_query": {
-                                    "time_series_filter": {
-                                        "filter": f'metric.type="custom.googleapis.com/pose_coach/pose_detection_latency" AND metric.labels.environment="{config.environment}"',
-                                        "aggregation": {
-                                            "alignment_period": "60s",
-                                            "per_series_aligner": "ALIGN_MEAN"
-                                        }
-                                    }
-                                }
-                            }]
-                        }
-                    },
-                    {
-                        "title": "Pose Accuracy",
-                        "xy_chart": {
-                            "data_sets": [{
-                                "time_series_query": {
-                                    "time_series_filter": {
-                                        "filter": f'metric.type="custom.googleapis.com/pose_coach/pose_accuracy" AND metric.labels.environment="{config.environment}"',
-                                        "aggregation": {
-                                            "alignment_period": "300s",
-                                            "per_series_aligner": "ALIGN_MEAN"
-                                        }
-                                    }
-                                }
-                            }]
-                        }
-                    },
-                    {
-                        "title": "Memory Usage",
-                        "xy_chart": {
-                            "data_sets": [{
-                                "time_series_query": {
-                                    "time_series_filter": {
-                                        "filter": f'metric.type="custom.googleapis.com/pose_coach/memory_usage" AND metric.labels.environment="{config.environment}"',
-                                        "aggregation": {
-                                            "alignment_period": "60s",
-                                            "per_series_aligner": "ALIGN_MEAN"
-                                        }
-                                    }
-                                }
-                            }]
-                        }
-                    },
-                    {
-                        "title": "Error Rate",
-                        "xy_chart": {
-                            "data_sets": [{
-                                "time_series_query": {
-                                    "time_series_filter": {
-                                        "filter": f'metric.type="logging.googleapis.com/log_entry_count" AND metric.labels.severity="ERROR"',
-                                        "aggregation": {
-                                            "alignment_period": "60s",
-                                            "per_series_aligner": "ALIGN_RATE"
-                                        }
-                                    }
-                                }
-                            }]
-                        }
-                    }
-                ]
-            }
-        }
+        dashboard_config = self._spec(config, "dashboard")
 
         try:
-            dashboard = monitoring_v3.Dashboard()
-            dashboard.display_name = dashboard_config["display_name"]
+            # Materialize the full layout, widgets included, so the single
+            # create call produces the finished dashboard
+            dashboard = _dashboard(dashboard_config)
 
-            # Convert config to protobuf format (simplified)
-            request = monitoring_v3.CreateDashboardRequest(
+            request = monitoring_dashboard_v1.CreateDashboardRequest(
                 parent=self.project_name,
                 dashboard=dashboard
             )
 
-            created_dashboard = dashboard_client.create_dashboard(request=request)
+            created_dashboard = self.dashboard_client.create_dashboard(request=request)
             logger.info(f"Created dashboard: {dashboard.display_name}")
             return created_dashboard.name
 
@@ -438,41 +695,70 @@ class MonitoringSetup:
 
     def _start_realtime_monitoring(self, config: MonitoringConfig):
         """Start real-time monitoring for the deployment"""
-        monitoring_config = {
-            "environment": config.environment,
-            "version": config.version,
-            "start_time": time.time(),
-            "duration": config.duration_minutes * 60,
-            "metrics": config.metrics_config
-        }
-
         # Save monitoring configuration
-        with open(f"monitoring-{config.environment}-{config.version}.json", 'w') as f:
-            json.dump(monitoring_config, f, indent=2)
+        with contextlib.closing(sqlite3.connect(_STATE_DB_PATH, isolation_level=None)) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                "environment TEXT NOT NULL, version TEXT NOT NULL, start_time REAL NOT NULL, "
+                "duration INTEGER NOT NULL, metrics TEXT NOT NULL, PRIMARY KEY (environment, version))"
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?)",
+                (config.environment, config.version, time.time(), config.duration_minutes * 60,
+                 json.dumps(config.metrics_config))
+            )
 
         logger.info(f"Started real-time monitoring for {config.duration_minutes} minutes")
 
+    def emit_terraform(self, config: MonitoringConfig, out_dir: str) -> List[str]:
+        """Render the monitoring resources as terraform files; return their paths"""
+        if jinja2 is None:
+            raise RuntimeError("jinja2 is required to emit terraform (pip install jinja2)")
+
+        dashboard = _dashboard(self._spec(config, "dashboard"))
+        contexts = {
+            # Descriptors stay opt-in, as in rpc mode
+            "metric_descriptors.tf": {
+                "metrics": self._spec(config, "custom_metrics") if config.create_descriptors else []
+            },
+            "alert_policies.tf": {
+                "policies": self._spec(config, "alert_policies"),
+                "notification_channels": config.alert_channels
+            },
+            "log_metrics.tf": {"log_metrics": self._spec(config, "log_metrics")},
+            "dashboards.tf": {
+                "dashboard_json": MessageToJson(monitoring_dashboard_v1.Dashboard.pb(dashboard), indent=2)
+            }
+        }
+
+        os.makedirs(out_dir, exist_ok=True)
+        env = _terraform_env()
+        paths = []
+        for filename, context in contexts.items():
+            path = os.path.join(out_dir, filename)
+            with open(path, 'w') as f:
+                f.write(env.get_template(filename).render(project_id=self.project_id, **context))
+            logger.info(f"Wrote terraform definitions: {path}")
+            paths.append(path)
+
+        return paths
+
     def setup_firebase_analytics(self, config: MonitoringConfig):
         """Set up Firebase Analytics for user behavior tracking"""
+        # Firebase is optional; CI jobs without the service account skip it
+        if not os.path.isfile(_FIREBASE_CREDENTIAL_PATH):
+            logger.warning(f"Firebase credentials not found, skipping Firebase Analytics: "
+                           f"{_FIREBASE_CREDENTIAL_PATH}")
+            return []
+
         try:
             # Initialize Firebase Admin SDK
             if not firebase_admin._apps:
-                cred = credentials.Certificate("firebase-service-account.json")
-                firebase_admin.initialize_app(cred)
-
-            # Set up custom events for tracking
-            custom_events = [
-                "pose_detection_started",
-                "pose_detection_completed",
-                "pose_accuracy_measured",
-                "user_session_started",
-                "user_session_ended",
-                "coaching_session_completed",
-                "ai_feedback_provided"
-            ]
+                firebase_admin.initialize_app(_firebase_credential())
 
             logger.info("Firebase Analytics configured for custom events")
-            return custom_events
+            return _FIREBASE_EVENTS
 
         except Exception as e:
             logger.error(f"Failed to setup Firebase Analytics: {e}")
@@ -480,32 +766,17 @@ class MonitoringSetup:
 
     def create_slo_monitoring(self, config: MonitoringConfig):
         """Create Service Level Objective monitoring"""
-        slo_configs = [
-            {
-                "name": "pose_detection_latency_slo",
-                "description": "Pose detection should complete within 200ms for 95% of requests",
-                "threshold": 200,  # ms
-                "target": 0.95    # 95%
-            },
-            {
-                "name": "pose_accuracy_slo",
-                "description": "Pose accuracy should be above 85% for 99% of detections",
-                "threshold": 0.85,
-                "target": 0.99
-            },
-            {
-                "name": "app_availability_slo",
-                "description": "App should be available 99.9% of the time",
-                "threshold": 0.999,
-                "target": 0.999
-            }
-        ]
+        for name in _SLOS.names:
+            logger.info(f"Setting up SLO monitoring: {name}")
+            # Implementation would create SLO monitoring based on _SLOS
 
-        for slo_config in slo_configs:
-            logger.info(f"Setting up SLO monitoring: {slo_config['name']}")
-            # Implementation would create SLO monitoring based on the config
+def validate_args(args) -> List[str]:
+    """Check arguments up front; return the problems found"""
+    return [f"invalid alert channel {channel!r} (expected projects/<project>/notificationChannels/<id>)"
+            for channel in args.alert_channels or [] if not _CHANNEL_RE.match(channel)]
 
-def main():
+def parse_args(argv: Optional[List[str]] = None):
+    """Parse and validate the command line, exiting with usage on a problem"""
     parser = argparse.ArgumentParser(description='Set up monitoring infrastructure')
     parser.add_argument('--environment', required=True,
                        help='Target environment (staging, production, beta)')
@@ -517,8 +788,36 @@ def main():
                        help='Google Cloud Project ID')
     parser.add_argument('--alert-channels', nargs='+',
                        help='Alert notification channels')
+    parser.add_argument('--create-descriptors', action='store_true',
+                       help='Explicitly create custom metric descriptors instead of relying on '
+                            'auto-creation from the first time series written')
+    parser.add_argument('--mode', choices=['rpc', 'terraform'],
+                       help='Create resources with API calls (rpc) or write terraform '
+                            'definitions for them (terraform) (default: terraform when '
+                            '--emit-terraform is given, otherwise rpc)')
+    parser.add_argument('--emit-terraform', metavar='DIR',
+                       help='Write terraform definitions to DIR instead of calling the APIs; '
+                            f'implies --mode terraform (default DIR: {_TERRAFORM_DIR})')
+
+    args = parser.parse_args(argv)
+
+    # Passing a terraform directory asks for terraform mode; never fall back
+    # to live API calls with it
+    if args.mode is None:
+        args.mode = 'terraform' if args.emit_terraform else 'rpc'
+    elif args.mode == 'rpc' and args.emit_terraform:
+        parser.error("--emit-terraform cannot be combined with --mode rpc")
+    if args.emit_terraform is None:
+        args.emit_terraform = _TERRAFORM_DIR
+
+    # Fail before any client is created or resource written
+    problems = validate_args(args)
+    if problems:
+        parser.error("; ".join(problems))
+    return args
 
-    args = parser.parse_args()
+def main():
+    args = parse_args()
 
     # Initialize monitoring setup
     monitoring_setup = MonitoringSetup(args.project_id)
@@ -535,13 +834,18 @@ def main():
             "memory_usage": {"threshold": 512, "unit": "MB"},
             "error_rate": {"threshold": 0.01, "unit": "ratio"}
         },
-        dashboards=["performance", "accuracy", "errors"]
+        dashboards=["performance", "accuracy", "errors"],
+        create_descriptors=args.create_descriptors
     )
 
     try:
         # Set up comprehensive monitoring
         logger.info(f"Setting up monitoring for {args.environment} v{args.version}")
-        monitoring_setup.setup_application_monitoring(config)
+        if args.mode == 'terraform':
+            # terraform apply creates or updates only what changed
+            monitoring_setup.emit_terraform(config, args.emit_terraform)
+        else:
+            asyncio.run(monitoring_setup.setup_application_monitoring(config))
 
         # Set up Firebase Analytics
         monitoring_setup.setup_firebase_analytics(config)
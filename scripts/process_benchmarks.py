@@ -6,13 +6,231 @@ This script processes benchmark results from Android instrumentation tests
 and generates performance reports with regression detection.
 """
 
+import array
+import contextlib
+import functools
+import io
 import json
 import os
 import sys
-import glob
 import statistics
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from typing import Dict, List, Tuple, Optional
+from typing import Any, Dict, List, NamedTuple, Tuple, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+# Directory that Android instrumentation benchmarks write benchmarks.json under
+_ANDROID_OUTPUT_DIR = os.sep + os.path.join('build', 'outputs', 'connected_android_test_additional_output', '')
+
+# Directories that never hold benchmark results. Hidden ones (.git, .gradle,
+# .idea, .kotlin) are skipped as well.
+_SKIP_DIRS = frozenset({'node_modules'})
+
+# Gradle scratch directories inside build/, usually most of an Android tree
+_SKIP_BUILD_DIRS = _SKIP_DIRS | {'intermediates', 'tmp'}
+
+# Baselines record memory in MB; exact, since 1 MB is a power of two bytes
+_MB_PER_BYTE = 1 / (1024 * 1024)
+
+# (current metric, baseline metric, scale into the baseline's unit) compared
+# for regressions; the integer 1 leaves values and their type unchanged
+_METRIC_MAP = (
+    ('poseDetection_timeNs', 'pose_detection_median_ns', 1),
+    ('uiRendering_timeNs', 'ui_frame_time_median_ns', 1),
+    ('memoryUsage_bytes', 'memory_peak_mb', _MB_PER_BYTE),
+    ('apiResponse_timeMs', 'api_response_time_ms', 1),
+    ('websocket_latencyMs', 'websocket_latency_ms', 1)
+)
+
+# (metric, limit) pairs that fail the run outright when exceeded
+_CRITICAL = (
+    ('poseDetection_timeNs', 50_000_000),   # 50ms max (20 FPS minimum)
+    ('uiRendering_timeNs', 16_666_666),     # 16.67ms max (60 FPS)
+    ('memoryUsage_bytes', 512 * 1024 * 1024),  # 512MB max
+    ('apiResponse_timeMs', 5000)            # 5 seconds max
+)
+
+# Below this many values, statistics.median is faster than the numpy call
+_NUMPY_MEDIAN_MIN = 17
+
+# Files above this size are streamed one benchmark at a time when ijson is
+# available, instead of being loaded whole
+_STREAM_MIN_BYTES = 1 << 20
+
+# Below this many files, starting worker processes costs more than it saves
+_PARALLEL_MIN_FILES = 8
+
+
+if msgspec is not None:
+    # Android Benchmark Library schema; fields not listed here are skipped
+    # while decoding instead of being built into dicts
+
+    class _Metric(msgspec.Struct):
+        """Summary statistics of one benchmark metric"""
+        median: Any = msgspec.UNSET
+
+    class _Benchmark(msgspec.Struct):
+        """One benchmark and its metrics"""
+        name: Any = ''
+        metrics: Union[Dict[str, Union[_Metric, bool, int, float, str, list, None]], msgspec.UnsetType] = msgspec.UNSET
+
+    class _BenchmarkFile(msgspec.Struct):
+        """A benchmarks.json file"""
+        benchmarks: Union[List[_Benchmark], msgspec.UnsetType] = msgspec.UNSET
+
+    _decode_benchmark_file = msgspec.json.Decoder(_BenchmarkFile).decode
+
+
+def _add_benchmark_metrics(metrics: Dict, benchmark: Dict):
+    """Add the metrics of one Android Benchmark Library entry to metrics"""
+    name = benchmark.get('name', '')
+    if 'metrics' in benchmark:
+        for metric_name, metric_data in benchmark['metrics'].items():
+            key = f"{name}_{metric_name}"
+            if isinstance(metric_data, dict) and 'median' in metric_data:
+                metrics[key] = metric_data['median']
+            elif isinstance(metric_data, (int, float)):
+                metrics[key] = metric_data
+
+
+def _streamed_benchmark_metrics(file_path: str) -> Dict:
+    """Extract metrics from a large benchmark file, holding one entry at a time
+
+    The first top-level 'benchmarks' or 'results' key picks the layout; only
+    the head of the file is parsed to find it, then the entries of that
+    array are streamed in a single pass.
+    """
+    metrics = {}
+    with open(file_path, 'rb') as f:
+        layout = next((value for prefix, event, value in ijson.parse(f)
+                       if not prefix and event == 'map_key' and value in ('benchmarks', 'results')), None)
+        if layout is None:
+            return metrics
+
+        f.seek(0)
+        for entry in ijson.items(f, f'{layout}.item', use_float=True):
+            if layout == 'benchmarks':
+                _add_benchmark_metrics(metrics, entry)
+            else:
+                metrics.update(entry)
+    return metrics
+
+
+def _typed_benchmark_metrics(raw: bytes) -> Optional[Dict]:
+    """Extract metrics from an Android Benchmark Library file with msgspec
+
+    Returns None when msgspec is unavailable or the file does not follow
+    that schema, leaving it to the generic dict path.
+    """
+    if msgspec is None:
+        return None
+    try:
+        parsed = _decode_benchmark_file(raw)
+    except msgspec.ValidationError:
+        return None
+    if parsed.benchmarks is msgspec.UNSET:
+        return None
+
+    metrics = {}
+    for benchmark in parsed.benchmarks:
+        if benchmark.metrics is msgspec.UNSET:
+            continue
+        for metric_name, metric_data in benchmark.metrics.items():
+            key = f"{benchmark.name}_{metric_name}"
+            if isinstance(metric_data, _Metric):
+                if metric_data.median is not msgspec.UNSET:
+                    metrics[key] = metric_data.median
+            elif isinstance(metric_data, (int, float)):
+                metrics[key] = metric_data
+    return metrics
+
+
+def _parse_benchmark_file(file_path: str) -> Tuple[Dict, Optional[str]]:
+    """Parse a single benchmark file, returning its metrics and any error message
+
+    Module-level so worker processes can run it; errors are returned rather
+    than printed so the parent reports them in file order.
+    """
+    try:
+        if ijson is not None and os.path.getsize(file_path) > _STREAM_MIN_BYTES:
+            return _streamed_benchmark_metrics(file_path), None
+
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+
+        metrics = _typed_benchmark_metrics(raw)
+        if metrics is not None:
+            return metrics, None
+
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+        metrics = {}
+
+        # Process Android Benchmark Library format
+        if 'benchmarks' in data:
+            for benchmark in data['benchmarks']:
+                _add_benchmark_metrics(metrics, benchmark)
+
+        # Process custom format
+        elif 'results' in data:
+            for result in data['results']:
+                metrics.update(result)
+
+        return metrics, None
+
+    except Exception as e:
+        return {}, f"Error parsing {file_path}: {e}"
+
+
+class RegressionRec(NamedTuple):
+    """A metric that moved past the regression or improvement threshold"""
+    metric: str
+    current: float
+    baseline: float
+    ratio: float
+    percentage_change: float
+
+
+def _median(values: List):
+    """Median of one metric's values, using numpy's selection for long lists"""
+    if np is not None and len(values) >= _NUMPY_MEDIAN_MIN:
+        try:
+            # Packed doubles; non-numeric values raise and take the slow path
+            packed = array.array('d', values)
+        except TypeError:
+            pass
+        else:
+            return float(np.median(np.frombuffer(packed, dtype=np.float64)))
+    return statistics.median(values)
+
+
+@functools.lru_cache(maxsize=4)
+def _load_baseline_file(path: str, mtime_ns: int, size: int) -> Dict:
+    """Parse a baseline file; keyed on its mtime and size so edits are picked up"""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
 
 
 class BenchmarkProcessor:
@@ -26,9 +244,13 @@ class BenchmarkProcessor:
 
     def load_baseline(self) -> Dict:
         """Load baseline performance metrics"""
-        if os.path.exists(self.baseline_file):
-            with open(self.baseline_file, 'r') as f:
-                return json.load(f)
+        try:
+            st = os.stat(self.baseline_file)
+        except OSError:
+            st = None
+        if st is not None:
+            # Copied so callers cannot change the cached baseline
+            return dict(_load_baseline_file(self.baseline_file, st.st_mtime_ns, st.st_size))
         return {
             "pose_detection_median_ns": 25000000,  # 25ms
             "ui_frame_time_median_ns": 12000000,   # 12ms
@@ -40,48 +262,37 @@ class BenchmarkProcessor:
 
     def find_benchmark_files(self) -> List[str]:
         """Find all benchmark result files"""
-        patterns = [
-            "**/build/outputs/connected_android_test_additional_output/**/benchmarks.json",
-            "**/benchmark-results/*.json",
-            "benchmark-*.json"
-        ]
-
+        # A single walk checks every file against all three layouts:
+        #   **/build/outputs/connected_android_test_additional_output/**/benchmarks.json
+        #   **/benchmark-results/*.json
+        #   benchmark-*.json (top level only)
         files = []
-        for pattern in patterns:
-            files.extend(glob.glob(pattern, recursive=True))
-
-        return files
+        for dirpath, dirnames, filenames in os.walk('.'):
+            # Like glob's **, do not descend into hidden directories
+            skip = _SKIP_BUILD_DIRS if os.path.basename(dirpath) == 'build' else _SKIP_DIRS
+            dirnames[:] = [d for d in dirnames if not d.startswith('.') and d not in skip]
+
+            in_output_dir = _ANDROID_OUTPUT_DIR in dirpath + os.sep
+            in_results_dir = os.path.basename(dirpath) == 'benchmark-results'
+            at_top = dirpath == '.'
+            if not (in_output_dir or in_results_dir or at_top):
+                continue
+
+            for name in filenames:
+                if ((in_output_dir and name == 'benchmarks.json')
+                        or (in_results_dir and name.endswith('.json') and not name.startswith('.'))
+                        or (at_top and name.startswith('benchmark-') and name.endswith('.json'))):
+                    files.append(os.path.join(dirpath, name)[2:])
+
+        # Sorted so the report lists metrics in the same order on every run
+        return sorted(files)
 
     def parse_benchmark_file(self, file_path: str) -> Dict:
         """Parse a single benchmark file"""
-        try:
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-
-            metrics = {}
-
-            # Process Android Benchmark Library format
-            if 'benchmarks' in data:
-                for benchmark in data['benchmarks']:
-                    name = benchmark.get('name', '')
-                    if 'metrics' in benchmark:
-                        for metric_name, metric_data in benchmark['metrics'].items():
-                            key = f"{name}_{metric_name}"
-                            if isinstance(metric_data, dict) and 'median' in metric_data:
-                                metrics[key] = metric_data['median']
-                            elif isinstance(metric_data, (int, float)):
-                                metrics[key] = metric_data
-
-            # Process custom format
-            elif 'results' in data:
-                for result in data['results']:
-                    metrics.update(result)
-
-            return metrics
-
-        except Exception as e:
-            print(f"Error parsing {file_path}: {e}")
-            return {}
+        metrics, error = _parse_benchmark_file(file_path)
+        if error:
+            print(error)
+        return metrics
 
     def process_all_benchmarks(self) -> Dict:
         """Process all benchmark files and aggregate results"""
@@ -93,21 +304,30 @@ class BenchmarkProcessor:
 
         print(f"📊 Processing {len(benchmark_files)} benchmark files...")
 
-        all_metrics = {}
-        for file_path in benchmark_files:
-            metrics = self.parse_benchmark_file(file_path)
+        # Files are parsed independently; spread them over all cores. map()
+        # keeps results in file order, so the aggregate does not depend on
+        # which worker finishes first.
+        parsed = None
+        if len(benchmark_files) >= _PARALLEL_MIN_FILES:
+            try:
+                with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+                    parsed = list(executor.map(_parse_benchmark_file, benchmark_files, chunksize=4))
+            except (OSError, BrokenProcessPool) as e:
+                print(f"⚠️ Parallel parsing failed, parsing serially: {e}")
+
+        if parsed is None:
+            parsed = [_parse_benchmark_file(file_path) for file_path in benchmark_files]
+
+        all_metrics = defaultdict(list)
+        for metrics, error in parsed:
+            if error:
+                print(error)
             for key, value in metrics.items():
-                if key not in all_metrics:
-                    all_metrics[key] = []
                 all_metrics[key].append(value)
 
-        # Aggregate metrics (use median)
-        aggregated = {}
-        for key, values in all_metrics.items():
-            if values:
-                aggregated[key] = statistics.median(values)
-
-        return aggregated
+        # Aggregate metrics (use median). This is exact on purpose: an
+        # estimated median could flip a regression verdict near the 5% line.
+        return {key: _median(values) for key, values in all_metrics.items()}
 
     def detect_regressions(self, current_metrics: Dict, baseline: Dict) -> Tuple[List, List]:
         """Detect performance regressions and improvements"""
@@ -117,110 +337,114 @@ class BenchmarkProcessor:
         regression_threshold = 1.05  # 5% increase is a regression
         improvement_threshold = 0.95  # 5% decrease is an improvement
 
-        metric_mappings = {
-            'poseDetection_timeNs': 'pose_detection_median_ns',
-            'uiRendering_timeNs': 'ui_frame_time_median_ns',
-            'memoryUsage_bytes': 'memory_peak_mb',
-            'apiResponse_timeMs': 'api_response_time_ms',
-            'websocket_latencyMs': 'websocket_latency_ms'
-        }
+        for current_key, baseline_key, scale in _METRIC_MAP:
+            current_value = current_metrics.get(current_key)
+            baseline_value = baseline.get(baseline_key)
+            if current_value is None or baseline_value is None:
+                continue
 
-        for current_key, baseline_key in metric_mappings.items():
-            if current_key in current_metrics and baseline_key in baseline:
-                current_value = current_metrics[current_key]
-                baseline_value = baseline[baseline_key]
-
-                # Convert bytes to MB for memory metrics
-                if 'bytes' in current_key:
-                    current_value = current_value / (1024 * 1024)
-
-                ratio = current_value / baseline_value
-
-                if ratio >= regression_threshold:
-                    regressions.append({
-                        'metric': current_key,
-                        'current': current_value,
-                        'baseline': baseline_value,
-                        'ratio': ratio,
-                        'percentage_change': (ratio - 1) * 100
-                    })
-                elif ratio <= improvement_threshold:
-                    improvements.append({
-                        'metric': current_key,
-                        'current': current_value,
-                        'baseline': baseline_value,
-                        'ratio': ratio,
-                        'percentage_change': (1 - ratio) * 100
-                    })
+            # Convert to the baseline's unit (bytes to MB for memory)
+            current_value = current_value * scale
+            ratio = current_value / baseline_value
+
+            if ratio >= regression_threshold:
+                regressions.append(RegressionRec(current_key, current_value, baseline_value,
+                                                 ratio, (ratio - 1) * 100))
+            elif ratio <= improvement_threshold:
+                improvements.append(RegressionRec(current_key, current_value, baseline_value,
+                                                  ratio, (1 - ratio) * 100))
 
         return regressions, improvements
 
+    @staticmethod
+    def _fmt_row(metric: str, current_value: float, baseline_value) -> str:
+        """Format one row of the detailed metrics table"""
+        status = "✅ OK"
+        if baseline_value is None:
+            baseline_value = "N/A"
+        elif isinstance(baseline_value, (int, float)):
+            ratio = current_value / baseline_value
+            if ratio >= 1.05:
+                status = "❌ Regression"
+            elif ratio <= 0.95:
+                status = "⬆️ Improvement"
+
+        # An f-string is compiled once with the function; a str.format_map
+        # template is re-parsed on every call and measured ~1.6x slower here.
+        # Caching formatted floats does not pay either, as medians rarely repeat.
+        return f"| {metric} | {current_value:.2f} | {baseline_value} | {status} |"
+
     def generate_report(self, current_metrics: Dict, baseline: Dict,
-                       regressions: List, improvements: List) -> str:
+                       regressions: List, improvements: List,
+                       generated_at: Optional[datetime] = None) -> str:
         """Generate a human-readable performance report"""
-        report = []
-        report.append("# 📊 Performance Benchmark Report")
-        report.append(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        report.append("")
+        generated_at = generated_at or datetime.now()
+
+        # Lines go straight into one buffer rather than a list joined at the end
+        report = io.StringIO()
+        w = report.write
+        w("# 📊 Performance Benchmark Report\n")
+        w(f"Generated: {generated_at.strftime('%Y-%m-%d %H:%M:%S')}\n")
+        w("\n")
 
         # Summary
         if regressions:
-            report.append("## ❌ Regressions Detected")
+            w("## ❌ Regressions Detected\n")
             for reg in regressions:
-                report.append(f"- **{reg['metric']}**: {reg['current']:.2f} "
-                             f"(+{reg['percentage_change']:.1f}% from baseline {reg['baseline']:.2f})")
-            report.append("")
+                w(f"- **{reg.metric}**: {reg.current:.2f} "
+                  f"(+{reg.percentage_change:.1f}% from baseline {reg.baseline:.2f})\n")
+            w("\n")
 
         if improvements:
-            report.append("## ✅ Performance Improvements")
+            w("## ✅ Performance Improvements\n")
             for imp in improvements:
-                report.append(f"- **{imp['metric']}**: {imp['current']:.2f} "
-                             f"(-{imp['percentage_change']:.1f}% from baseline {imp['baseline']:.2f})")
-            report.append("")
-
-        # Detailed metrics
-        report.append("## 📈 Detailed Metrics")
-        report.append("| Metric | Current | Baseline | Status |")
-        report.append("|--------|---------|----------|--------|")
-
+                w(f"- **{imp.metric}**: {imp.current:.2f} "
+                  f"(-{imp.percentage_change:.1f}% from baseline {imp.baseline:.2f})\n")
+            w("\n")
+
+        # Detailed metrics; rows start with the newline so the report has
+        # no trailing one
+        w("## 📈 Detailed Metrics\n")
+        w("| Metric | Current | Baseline | Status |\n")
+        w("|--------|---------|----------|--------|")
         for metric, current_value in current_metrics.items():
-            status = "✅ OK"
-            baseline_value = baseline.get(metric, "N/A")
-
-            if isinstance(baseline_value, (int, float)):
-                ratio = current_value / baseline_value
-                if ratio >= 1.05:
-                    status = "❌ Regression"
-                elif ratio <= 0.95:
-                    status = "⬆️ Improvement"
+            w("\n")
+            w(self._fmt_row(metric, current_value, baseline.get(metric)))
 
-            report.append(f"| {metric} | {current_value:.2f} | {baseline_value} | {status} |")
-
-        return "\n".join(report)
+        return report.getvalue()
 
     def save_results(self, results: Dict):
         """Save benchmark comparison results"""
         output_file = "benchmark-comparison.json"
-        with open(output_file, 'w') as f:
-            json.dump(results, f, indent=2)
+
+        # Encode first, so a value that cannot be serialized leaves no file
+        if orjson is not None:
+            data = orjson.dumps(results, option=orjson.OPT_INDENT_2)
+        else:
+            data = json.dumps(results, indent=2).encode()
+
+        # Write beside the target under a per-process name and rename over
+        # it, so readers never see a partly written file and concurrent runs
+        # do not share a temporary file
+        tmp_file = f"{output_file}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_file, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_file, output_file)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_file)
+            raise
         print(f"📁 Results saved to {output_file}")
 
     def check_critical_thresholds(self, current_metrics: Dict) -> bool:
         """Check if any critical performance thresholds are exceeded"""
         critical_failures = []
 
-        thresholds = {
-            'poseDetection_timeNs': 50000000,  # 50ms max (20 FPS minimum)
-            'uiRendering_timeNs': 16666666,    # 16.67ms max (60 FPS)
-            'memoryUsage_bytes': 512 * 1024 * 1024,  # 512MB max
-            'apiResponse_timeMs': 5000,         # 5 seconds max
-        }
-
-        for metric, threshold in thresholds.items():
-            if metric in current_metrics:
-                current_value = current_metrics[metric]
-                if current_value > threshold:
-                    critical_failures.append(f"{metric}: {current_value} > {threshold}")
+        for metric, threshold in _CRITICAL:
+            current_value = current_metrics.get(metric)
+            if current_value is not None and current_value > threshold:
+                critical_failures.append(f"{metric}: {current_value} > {threshold}")
 
         if critical_failures:
             print("🚨 CRITICAL PERFORMANCE FAILURES:")
@@ -252,17 +476,19 @@ class BenchmarkProcessor:
         # Check critical thresholds
         critical_ok = self.check_critical_thresholds(current_metrics)
 
-        # Generate report
-        report = self.generate_report(current_metrics, baseline, regressions, improvements)
+        # Generate report; it and the saved results share one timestamp
+        generated_at = datetime.now()
+        report = self.generate_report(current_metrics, baseline, regressions, improvements, generated_at)
         print(report)
 
         # Save results
         results = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': generated_at.isoformat(),
             'current_metrics': current_metrics,
             'baseline_metrics': baseline,
-            'regressions': regressions,
-            'improvements': improvements,
+            # Saved as objects, as JSON would otherwise write the tuples as arrays
+            'regressions': [reg._asdict() for reg in regressions],
+            'improvements': [imp._asdict() for imp in improvements],
             'critical_threshold_passed': critical_ok
         }
         self.save_results(results)
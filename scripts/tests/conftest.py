@@ -0,0 +1,52 @@
+"""Shared fixtures for the tests of the scripts in scripts/"""
+
+import importlib.util
+import os
+
+import pytest
+
+_SCRIPTS_DIR = os.path.join(os.path.dirname(__file__), os.pardir)
+
+
+def _load_script(relative_path: str, name: str):
+    """Import a script by path; several have hyphens in their file names"""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(_SCRIPTS_DIR, relative_path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="session")
+def security_compliance():
+    return _load_script(os.path.join("ci", "security-compliance.py"), "security_compliance")
+
+
+@pytest.fixture(scope="session")
+def process_benchmarks():
+    return _load_script("process_benchmarks.py", "process_benchmarks")
+
+
+@pytest.fixture(scope="session")
+def setup_monitoring():
+    for name in ("google.cloud.monitoring_v3", "google.cloud.monitoring_dashboard_v1",
+                 "google.cloud.logging", "firebase_admin"):
+        pytest.importorskip(name)
+    return _load_script(os.path.join("ci", "setup-monitoring.py"), "setup_monitoring")
+
+
+@pytest.fixture
+def backend(request, monkeypatch):
+    """Return a script module with some of its optional modules hidden
+
+    Parametrize indirectly with (script fixture name, required module, hidden
+    modules). The test is skipped unless the required module is installed,
+    and each hidden module global is set to None so the script takes its
+    fallback path.
+    """
+    script, required, hidden = request.param
+    module = request.getfixturevalue(script)
+    if required is not None and getattr(module, required) is None:
+        pytest.skip(f"{required} is not installed")
+    for name in hidden:
+        monkeypatch.setattr(module, name, None)
+    return module
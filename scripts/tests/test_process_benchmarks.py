@@ -0,0 +1,151 @@
+"""Benchmark file parsing and comparison in scripts/process_benchmarks.py"""
+
+import glob
+import json
+import types
+
+import pytest
+
+ANDROID_BENCHMARKS = {
+    "context": {"build": {"device": "Pixel"}},
+    "benchmarks": [
+        {
+            "name": "poseDetection",
+            "metrics": {
+                "timeNs": {"minimum": 1000, "maximum": 3000, "median": 2100.5, "runs": [1000, 2100.5, 3000]},
+                "allocationCount": {"median": 12},
+                "frames": 60,
+                "ratio": 0.75,
+                "noMedian": {"minimum": 1},
+            },
+        },
+        {"name": "noMetrics"},
+        {"name": "startup", "metrics": {"timeNs": {"median": 450000000}}},
+    ],
+}
+
+ANDROID_METRICS = {
+    "poseDetection_timeNs": 2100.5,
+    "poseDetection_allocationCount": 12,
+    "poseDetection_frames": 60,
+    "poseDetection_ratio": 0.75,
+    "startup_timeNs": 450000000,
+}
+
+CUSTOM_RESULTS = {"results": [{"pose_detection_latency": 120}, {"pose_accuracy": 0.91, "memory_usage_mb": 240.5}]}
+
+CUSTOM_METRICS = {"pose_detection_latency": 120, "pose_accuracy": 0.91, "memory_usage_mb": 240.5}
+
+# (backend fixture parameter, whether to stream regardless of file size)
+parse_paths = pytest.mark.parametrize("backend, streamed", [
+    (("process_benchmarks", "ijson", ()), True),
+    (("process_benchmarks", "msgspec", ("ijson",)), False),
+    (("process_benchmarks", "orjson", ("ijson", "msgspec")), False),
+    (("process_benchmarks", None, ("ijson", "msgspec", "orjson")), False),
+], ids=["streamed", "msgspec", "orjson", "json"], indirect=["backend"])
+
+
+def _write(tmp_path, name, document):
+    path = tmp_path / name
+    path.write_text(document if isinstance(document, str) else json.dumps(document))
+    return str(path)
+
+
+@parse_paths
+@pytest.mark.parametrize("document, expected", [
+    (ANDROID_BENCHMARKS, ANDROID_METRICS),
+    (CUSTOM_RESULTS, CUSTOM_METRICS),
+    ({"context": {}}, {}),
+], ids=["android", "custom", "neither"])
+def test_parse_paths_agree(backend, streamed, document, expected, monkeypatch, tmp_path):
+    if streamed:
+        monkeypatch.setattr(backend, "_STREAM_MIN_BYTES", -1)
+
+    assert backend._parse_benchmark_file(_write(tmp_path, "benchmark-x.json", document)) == (expected, None)
+
+
+@parse_paths
+def test_parse_error_is_returned(backend, streamed, monkeypatch, tmp_path):
+    if streamed:
+        monkeypatch.setattr(backend, "_STREAM_MIN_BYTES", -1)
+    path = _write(tmp_path, "benchmark-bad.json", "{not json")
+
+    metrics, error = backend._parse_benchmark_file(path)
+
+    assert metrics == {}
+    assert error.startswith(f"Error parsing {path}")
+
+
+@pytest.mark.parametrize("backend", [("process_benchmarks", "ijson", ())], ids=["streamed"], indirect=True)
+@pytest.mark.parametrize("document, expected", [
+    (ANDROID_BENCHMARKS, ANDROID_METRICS),
+    (CUSTOM_RESULTS, CUSTOM_METRICS),
+], ids=["android", "custom"])
+def test_streamed_file_is_parsed_once(backend, document, expected, monkeypatch, tmp_path):
+    def in_memory(*args):
+        raise AssertionError("streamed file was parsed again in memory")
+
+    monkeypatch.setattr(backend, "_STREAM_MIN_BYTES", -1)
+    monkeypatch.setattr(backend, "_typed_benchmark_metrics", in_memory)
+    monkeypatch.setattr(backend, "orjson", None)
+    monkeypatch.setattr(backend, "json", types.SimpleNamespace(loads=in_memory))
+
+    assert backend._parse_benchmark_file(_write(tmp_path, "benchmark-big.json", document)) == (expected, None)
+
+
+BENCHMARK_TREE = [
+    "build/outputs/connected_android_test_additional_output/benchmarks.json",
+    "build/outputs/connected_android_test_additional_output/device/benchmarks.json",
+    "app/build/outputs/connected_android_test_additional_output/benchmarks.json",
+    "app/build/outputs/connected_android_test_additional_output/other.json",
+    "app/build/outputs/other/benchmarks.json",
+    "mybuild/outputs/connected_android_test_additional_output/benchmarks.json",
+    "app/xbuild/outputs/connected_android_test_additional_output/device/benchmarks.json",
+    "benchmark-results/a.json",
+    "benchmark-results/.hidden.json",
+    "benchmark-results/notes.txt",
+    "tools/benchmark-results/b.json",
+    "tools/benchmark-results/nested/c.json",
+    ".cache/benchmark-results/d.json",
+    "benchmark-local.json",
+    "sub/benchmark-nested.json",
+]
+
+
+def test_find_benchmark_files_matches_the_glob_patterns(process_benchmarks, monkeypatch, tmp_path):
+    for relative_path in BENCHMARK_TREE:
+        path = tmp_path / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("{}")
+    monkeypatch.chdir(tmp_path)
+
+    found = process_benchmarks.BenchmarkProcessor().find_benchmark_files()
+
+    # The directory walk replaced these globs and must find the same files
+    expected = set()
+    for pattern in ("**/build/outputs/connected_android_test_additional_output/**/benchmarks.json",
+                    "**/benchmark-results/*.json", "benchmark-*.json"):
+        expected.update(glob.glob(pattern, recursive=True))
+    assert found == sorted(expected)
+    assert not any(path.startswith(("mybuild", "app/xbuild")) for path in found)
+
+
+def test_memory_is_compared_in_megabytes(process_benchmarks):
+    current = {"memoryUsage_bytes": 300 * 1024 * 1024, "poseDetection_timeNs": 20_000_000}
+    baseline = {"memory_peak_mb": 250, "pose_detection_median_ns": 20_000_000}
+
+    regressions, improvements = process_benchmarks.BenchmarkProcessor().detect_regressions(current, baseline)
+
+    assert improvements == []
+    assert regressions == [process_benchmarks.RegressionRec("memoryUsage_bytes", 300.0, 250, 1.2, pytest.approx(20.0))]
+
+
+def test_unscaled_metrics_keep_their_type(process_benchmarks):
+    current = {"apiResponse_timeMs": 80, "websocket_latencyMs": 130}
+    baseline = {"api_response_time_ms": 100, "websocket_latency_ms": 100}
+
+    regressions, improvements = process_benchmarks.BenchmarkProcessor().detect_regressions(current, baseline)
+
+    assert [(rec.metric, rec.current) for rec in regressions] == [("websocket_latencyMs", 130)]
+    assert [(rec.metric, rec.current) for rec in improvements] == [("apiResponse_timeMs", 80)]
+    assert all(type(rec.current) is int for rec in regressions + improvements)
@@ -0,0 +1,69 @@
+"""Keyword matching in scripts/ci/security-compliance.py"""
+
+import re
+
+import pytest
+
+# Regexes whose escapes change meaning when lower-cased, checked on top of
+# every source keyword
+EXTRA_PATTERNS = frozenset({r"token\Dx", r"\bAES\b", r"Se[Cc]ret\s+KEY", "Do Not Sell"})
+
+TEXTS = [
+    "",
+    "nothing to see here",
+    "Authorization: Bearer XYZ",
+    "PASSWORD Strength meter",
+    "password\nstrength",
+    "Two-Factor login, MULTI\nfactor",
+    "Pin the Certificate before certificate pinning",
+    "token_x TOKEN55X",
+    "https://EXAMPLE.com",
+    "Network_Security_Config and VPN\ndetect",
+    "vpn detect, Network Detection",
+    "aes-256 AESX secret   key",
+    "DO NOT SELL my data",
+]
+
+keyword_backends = pytest.mark.parametrize("backend", [
+    ("security_compliance", "hyperscan", ()),
+    ("security_compliance", "ahocorasick", ("hyperscan",)),
+    ("security_compliance", None, ("hyperscan", "ahocorasick")),
+], ids=["hyperscan", "ahocorasick", "plain"], indirect=True)
+
+
+def _patterns(module):
+    return module._SOURCE_KEYWORDS | EXTRA_PATTERNS
+
+
+def _expected(patterns, text):
+    return {pattern for pattern in patterns if re.search(pattern, text, re.IGNORECASE)}
+
+
+@keyword_backends
+@pytest.mark.parametrize("text", TEXTS)
+def test_matches_like_re_search(backend, text):
+    patterns = _patterns(backend)
+    assert backend._match_keywords([text.encode()], patterns) == _expected(patterns, text)
+
+
+@keyword_backends
+def test_matches_across_contents(backend):
+    patterns = _patterns(backend)
+    expected = set().union(*(_expected(patterns, text) for text in TEXTS))
+    assert backend._match_keywords([text.encode() for text in TEXTS], patterns) == expected
+
+
+@keyword_backends
+def test_buffer_with_every_keyword(backend):
+    # Seeing every pattern stops a Hyperscan scan early, which it reports by
+    # raising ScanTerminated
+    patterns = frozenset({"foo", "bar", r"ba\w"})
+    assert backend._match_keywords([b"foo bar"], patterns) == patterns
+
+
+@keyword_backends
+def test_known_patterns_are_not_reported_again(backend):
+    matcher = backend._KeywordMatcher({"foo", "bar", "baz"})
+    assert matcher.scan(b"foo bar", {"baz"}) == {"foo", "bar"}
+    assert matcher.scan(b"foo bar baz", {"foo"}) == {"bar", "baz"}
+    assert matcher.scan(b"foo", {"foo", "bar", "baz"}) == set()
@@ -0,0 +1,292 @@
+"""Resource creation in scripts/ci/setup-monitoring.py, against fake clients"""
+
+import json
+import os
+import types
+
+import pytest
+
+
+class FakeAlertClient:
+    def __init__(self, calls, existing=None, failing=()):
+        self.calls = calls
+        self.existing = existing or {}
+        self.failing = failing
+
+    def list_alert_policies(self, name):
+        return [types.SimpleNamespace(display_name=display_name, name=resource_name)
+                for display_name, resource_name in self.existing.items()]
+
+    def create_alert_policy(self, request):
+        self.calls.append(("create_alert_policy", request.alert_policy.display_name))
+
+    def update_alert_policy(self, request):
+        if request.alert_policy.display_name in self.failing:
+            raise RuntimeError("update rejected")
+        self.calls.append(("update_alert_policy", request.alert_policy.display_name, request.alert_policy.name))
+
+
+class FakeLoggingClient:
+    def __init__(self, calls, existing=()):
+        self.calls = calls
+        self.existing = existing
+
+    def list_metrics(self):
+        return [types.SimpleNamespace(name=name) for name in self.existing]
+
+    def metric(self, name, filter_, description):
+        calls = self.calls
+        return types.SimpleNamespace(create=lambda: calls.append(("create_log_metric", name)),
+                                     update=lambda: calls.append(("update_log_metric", name)))
+
+
+class FakeMetricClient:
+    def __init__(self, calls, existing=()):
+        self.calls = calls
+        self.existing = set(existing)
+
+    def get_metric_descriptor(self, name):
+        from google.api_core.exceptions import NotFound
+        metric_type = name.split("/metricDescriptors/", 1)[1]
+        self.calls.append(("get_metric_descriptor", metric_type))
+        if metric_type not in self.existing:
+            raise NotFound(metric_type)
+
+    def create_metric_descriptor(self, request):
+        self.calls.append(("create_metric_descriptor", request.metric_descriptor.type))
+
+
+@pytest.fixture
+def config(setup_monitoring):
+    return setup_monitoring.MonitoringConfig(
+        environment="staging", version="1.2.3", duration_minutes=1, alert_channels=[],
+        metrics_config={}, dashboards=[], create_descriptors=True
+    )
+
+
+@pytest.fixture
+def monitoring(setup_monitoring, monkeypatch, tmp_path):
+    """Point the manifest into tmp_path and let writes through unthrottled"""
+    monkeypatch.setattr(setup_monitoring, "_MANIFEST_PATH", str(tmp_path / "manifest.json"))
+    monkeypatch.setattr(setup_monitoring, "_MONITORING_WRITES", types.SimpleNamespace(acquire=lambda: None))
+
+    def make(**clients):
+        setup = setup_monitoring.MonitoringSetup("test-project")
+        # The clients are cached properties; seeding the instance dict
+        # replaces them
+        setup.__dict__.update(clients)
+        return setup
+    return make
+
+
+def _names(setup, config, section, key):
+    return [definition[key] for definition in setup._spec(config, section)]
+
+
+def test_unchanged_definitions_are_skipped(monitoring, config):
+    calls = []
+    setup = monitoring(alert_client=FakeAlertClient(calls), logging_client=FakeLoggingClient(calls))
+    setup._setup_alerting_policies(config)
+    setup._setup_log_metrics(config)
+    assert calls
+
+    calls.clear()
+    rerun = monitoring(alert_client=FakeAlertClient(calls), logging_client=FakeLoggingClient(calls))
+    rerun._setup_alerting_policies(config)
+    rerun._setup_log_metrics(config)
+    assert calls == []
+
+
+def test_manifest_is_kept_per_project(setup_monitoring, monitoring, config):
+    setup = monitoring(alert_client=FakeAlertClient([]))
+    setup._setup_alerting_policies(config)
+
+    with open(setup_monitoring._MANIFEST_PATH) as f:
+        manifest = json.load(f)
+    assert list(manifest) == ["test-project"]
+    assert all(key.startswith("alert_policy:") for key in manifest["test-project"])
+
+
+def test_existing_alert_policy_is_updated_in_place(monitoring, config):
+    calls = []
+    setup = monitoring(alert_client=FakeAlertClient(calls))
+    first, *others = _names(setup, config, "alert_policies", "display_name")
+    setup.alert_client.existing = {first: "projects/test-project/alertPolicies/1"}
+
+    setup._setup_alerting_policies(config)
+
+    assert ("update_alert_policy", first, "projects/test-project/alertPolicies/1") in calls
+    assert sorted(call[1] for call in calls if call[0] == "create_alert_policy") == sorted(others)
+
+
+def test_failed_update_is_retried(monitoring, config):
+    calls = []
+    setup = monitoring(alert_client=FakeAlertClient(calls))
+    first = _names(setup, config, "alert_policies", "display_name")[0]
+    existing = {first: "projects/test-project/alertPolicies/1"}
+    setup.alert_client.existing = existing
+    setup.alert_client.failing = {first}
+    setup._setup_alerting_policies(config)
+
+    calls.clear()
+    rerun = monitoring(alert_client=FakeAlertClient(calls, existing))
+    rerun._setup_alerting_policies(config)
+    assert calls == [("update_alert_policy", first, "projects/test-project/alertPolicies/1")]
+
+
+def test_existing_log_metric_is_updated(monitoring, config):
+    calls = []
+    setup = monitoring(logging_client=FakeLoggingClient(calls))
+    first, *others = _names(setup, config, "log_metrics", "name")
+    setup.logging_client.existing = [first]
+
+    setup._setup_log_metrics(config)
+
+    assert ("update_log_metric", first) in calls
+    assert sorted(call[1] for call in calls if call[0] == "create_log_metric") == sorted(others)
+
+
+def test_render_fills_nested_placeholders(setup_monitoring):
+    spec = {"name": "latency_{environment}", "labels": [{"value": "v{version}"}], "threshold": 200, "enabled": True}
+
+    rendered = setup_monitoring._render(spec, {"environment": "beta", "version": "2"})
+
+    assert rendered == {"name": "latency_beta", "labels": [{"value": "v2"}], "threshold": 200, "enabled": True}
+    assert spec["name"] == "latency_{environment}"
+
+
+def test_spec_renders_every_placeholder(monitoring, config):
+    setup = monitoring()
+    for section in ("custom_metrics", "alert_policies", "log_metrics", "dashboard"):
+        text = json.dumps(setup._spec(config, section))
+        assert "{environment" not in text and "{version}" not in text
+        assert setup._spec(config, section) is setup._spec(config, section)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def test_write_throttle_paces_after_the_burst(setup_monitoring, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(setup_monitoring, "time", clock)
+    throttle = setup_monitoring._WriteThrottle(rate=3, period=6.0)
+
+    for _ in range(3):
+        throttle.acquire()
+    assert clock.slept == []
+
+    throttle.acquire()
+    assert clock.slept == [pytest.approx(2.0)]
+
+
+def test_write_throttle_refills_up_to_capacity(setup_monitoring, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(setup_monitoring, "time", clock)
+    throttle = setup_monitoring._WriteThrottle(rate=2, period=2.0)
+    throttle.acquire()
+    throttle.acquire()
+
+    clock.now += 60.0
+    for _ in range(2):
+        throttle.acquire()
+    assert clock.slept == []
+    throttle.acquire()
+    assert clock.slept == [pytest.approx(1.0)]
+
+
+def test_existing_descriptor_is_recorded_when_first_seen(monitoring, config):
+    calls = []
+    setup = monitoring(monitoring_client=FakeMetricClient(calls))
+    first, *others = _names(setup, config, "custom_metrics", "type")
+    setup.monitoring_client.existing = {first}
+    setup._create_custom_metrics(config)
+    assert sorted(call[1] for call in calls if call[0] == "create_metric_descriptor") == sorted(others)
+
+    calls.clear()
+    rerun = monitoring(monitoring_client=FakeMetricClient(calls, {first}))
+    rerun._create_custom_metrics(config)
+    assert calls == []
+
+
+def test_changed_descriptor_is_not_recorded(monitoring, config, caplog):
+    setup = monitoring(monitoring_client=FakeMetricClient([]))
+    setup._create_custom_metrics(config)
+    first = _names(setup, config, "custom_metrics", "type")[0]
+
+    def changed_spec(config, section):
+        return [{**definition, "description": "changed"} if definition["type"] == first else definition
+                for definition in setup._spec(config, section)]
+
+    for _ in range(2):
+        calls = []
+        rerun = monitoring(monitoring_client=FakeMetricClient(calls, {first}))
+        rerun._spec = changed_spec
+        rerun._create_custom_metrics(config)
+        assert calls == [("get_metric_descriptor", first)]
+    assert f"cannot be updated: {first}" in caplog.text
+
+
+REQUIRED_ARGS = ["--environment", "staging", "--version", "1.2.3", "--project-id", "test-project"]
+
+
+@pytest.mark.parametrize("argv, mode, out_dir", [
+    (["--mode", "terraform"], "terraform", "monitoring-terraform"),
+    (["--emit-terraform", "out"], "terraform", "out"),
+    (["--mode", "terraform", "--emit-terraform", "out"], "terraform", "out"),
+])
+def test_terraform_mode_arguments(setup_monitoring, argv, mode, out_dir):
+    args = setup_monitoring.parse_args(REQUIRED_ARGS + argv)
+    assert (args.mode, args.emit_terraform) == (mode, out_dir)
+
+
+def test_emit_terraform_rejects_rpc_mode(setup_monitoring, capsys):
+    with pytest.raises(SystemExit):
+        setup_monitoring.parse_args(REQUIRED_ARGS + ["--mode", "rpc", "--emit-terraform", "out"])
+    assert "--emit-terraform cannot be combined with --mode rpc" in capsys.readouterr().err
+
+
+def test_emit_terraform_writes_every_resource(setup_monitoring, monitoring, config, tmp_path):
+    setup = monitoring()
+    config.alert_channels = ["projects/test-project/notificationChannels/7"]
+
+    paths = setup.emit_terraform(config, str(tmp_path))
+
+    assert sorted(os.path.basename(path) for path in paths) == [
+        "alert_policies.tf", "dashboards.tf", "log_metrics.tf", "metric_descriptors.tf"
+    ]
+    files = {os.path.basename(path): open(path).read() for path in paths}
+    assert all('"test-project"' in text for text in files.values())
+    for metric_type in _names(setup, config, "custom_metrics", "type"):
+        assert f'"{metric_type}"' in files["metric_descriptors.tf"]
+    for display_name in _names(setup, config, "alert_policies", "display_name"):
+        assert f'"{display_name}"' in files["alert_policies.tf"]
+    assert "projects/test-project/notificationChannels/7" in files["alert_policies.tf"]
+    for name in _names(setup, config, "log_metrics", "name"):
+        assert f'"{name}"' in files["log_metrics.tf"]
+    assert "Pose Coach" in files["dashboards.tf"]
+
+
+def test_rpc_mode_runs_without_firebase_credentials(setup_monitoring, monitoring, config, monkeypatch, tmp_path, caplog):
+    monkeypatch.chdir(tmp_path)
+
+    args = setup_monitoring.parse_args(REQUIRED_ARGS + ["--mode", "rpc"])
+
+    assert args.mode == "rpc"
+    assert monitoring().setup_firebase_analytics(config) == []
+    assert "skipping Firebase Analytics" in caplog.text
+
+
+def test_invalid_alert_channel_is_rejected(setup_monitoring, capsys):
+    with pytest.raises(SystemExit):
+        setup_monitoring.parse_args(REQUIRED_ARGS + ["--alert-channels", "email:oncall"])
+    assert "invalid alert channel 'email:oncall'" in capsys.readouterr().err